@@ -1,5 +1,7 @@
+from core.frontpage import invalidate_frontpage
 from django.conf import settings
 from django.db import models
+from django.db import transaction
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
@@ -37,6 +39,20 @@ class Article(models.Model):
     def __str__(self):
         return self.name
 
+    # Articles are displayed on the front page, so it needs to be rendered
+    # again whenever they change. See `core.frontpage`.
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            transaction.on_commit(invalidate_frontpage)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            transaction.on_commit(invalidate_frontpage)
+
+        return result
+
     def get_absolute_url(self):
         return reverse("article", kwargs={"article_id": self.id})
 
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.models import Group
+from .models import OutgoingMail
 from .models import User
 
 admin.site.unregister(Group)
@@ -16,3 +17,9 @@ class UserAdmin(admin.ModelAdmin):
         "is_superuser",
     ]
     search_fields = ["username", "author__name", "email", "contact_name"]
+
+
+@admin.register(OutgoingMail)
+class OutgoingMailAdmin(admin.ModelAdmin):
+    list_display = ["subject", "recipients", "created", "attempts", "sent"]
+    search_fields = ["subject", "recipients"]
@@ -1,4 +1,5 @@
 from django.conf import settings
+from poem.models import EditorialStatusCount
 
 
 def globals(request):
@@ -9,4 +10,7 @@ def globals(request):
         "NEWEST_COUNT": settings.NEWEST_COUNT,
         "CONTACT_EMAIL": settings.CONTACT_EMAIL,
         "MATOMO_URL": settings.MATOMO_URL,
+        "USER_FRAGMENTS": settings.USER_FRAGMENTS,
+        # Only counted when a template asks for it.
+        "pending_poem_count": lambda: EditorialStatusCount.objects.get_count("pending"),
     }
@@ -0,0 +1,32 @@
+from django.core.cache import caches
+from uuid import uuid4
+
+# The front page as seen by anonymous visitors is the same for all of them on
+# any given day, so it is rendered once per day and served from the "pages"
+# cache, configured in the settings, which should be shared by all worker
+# processes.
+#
+# Like with search results (see `poem.search.search_cache_key()`), every
+# cache key contains the current generation of the cache, which is replaced
+# whenever something shown on the front page changes, such as daily poems,
+# news articles or private paths. The key also contains the day, so the page
+# rolls over at midnight by itself. The next day's page can be rendered
+# before midnight with the `render_frontpage` management command.
+#
+# Anonymous visitors still need their own CSRF token in the login form, so
+# the page is cached with a placeholder in its place, which is replaced with
+# the visitor's token when the page is served.
+
+CSRF_TOKEN_PLACEHOLDER = "CSRFTOKENPLACEHOLDER"
+
+
+def frontpage_cache_key(day):
+    cache = caches["pages"]
+    generation = cache.get_or_set(
+        "frontpage-generation", lambda: uuid4().hex, timeout=None
+    )
+    return "frontpage:%s:%s" % (generation, day.isoformat())
+
+
+def invalidate_frontpage():
+    caches["pages"].set("frontpage-generation", uuid4().hex, timeout=None)
@@ -0,0 +1,61 @@
+import markdown
+import re
+from core.models import OutgoingMail
+from django.core.mail import EmailMultiAlternatives
+from functools import cache
+from nmdmail import EmailContent
+
+# Emails are written in Markdown, like with `django_mdmail.send_mail()`, but
+# instead of being sent right away, they are queued in the `OutgoingMail`
+# table and sent by the `send_outgoing_mail` management command.
+#
+# The HTML version of every email is the same styled document around the
+# message itself. Generating it with `nmdmail` means parsing and prettifying
+# the whole document for every email, so it is only done once, around a
+# placeholder, which is then replaced with each message converted to HTML.
+
+CONTENT_PLACEHOLDER = "MAILCONTENTPLACEHOLDER"
+
+
+@cache
+def html_shell():
+    html = EmailContent(CONTENT_PLACEHOLDER).html
+
+    # Markdown puts the placeholder in a paragraph of its own.
+    before, after = re.split(r"<p>\s*%s\s*</p>" % CONTENT_PLACEHOLDER, html)
+    return before, after
+
+
+# Returns the text and HTML versions of the given Markdown message, the same
+# as `nmdmail.EmailContent` would, save for whitespace in the HTML.
+def render_markdown(message):
+    md = markdown.Markdown(
+        extensions=["markdown.extensions.tables", "markdown.extensions.meta"]
+    )
+    content = md.convert(message)
+
+    before, after = html_shell()
+    return "\n".join(md.lines), before + content + after
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    return OutgoingMail.objects.create(
+        subject=subject,
+        message=message,
+        from_email=from_email,
+        recipients="\n".join(recipient_list),
+    )
+
+
+# Builds an email with text and HTML versions of the given Markdown message,
+# like `django_mdmail.send_mail()` does, except that it can be sent over an
+# already open connection.
+def build_mail(subject, message, from_email, recipient_list, connection=None):
+    text, html = render_markdown(message)
+
+    email = EmailMultiAlternatives(
+        subject, text, from_email, recipient_list, connection=connection
+    )
+    email.attach_alternative(html, "text/html")
+
+    return email
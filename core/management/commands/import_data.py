@@ -16,6 +16,7 @@ from django.core.management.base import BaseCommand
 from django.db import connections
 from django.db import transaction
 from django.db.models import Count
+from django.db.models import Max
 from django.utils import timezone
 from django.utils.html import strip_tags
 
@@ -27,6 +28,7 @@ from poem.models import Author
 from poem.models import Bookmark
 from poem.models import DayPoem
 from poem.models import EditorialDecision
+from poem.models import EditorialStatusCount
 from poem.models import Poem
 
 
@@ -95,6 +97,8 @@ class Command(BaseCommand):
 
             self.import_poems()
 
+            self.count_approved_poems()
+
             self.import_day_poem()
 
             self.import_bookmarks()
@@ -384,7 +388,11 @@ class Command(BaseCommand):
                     # the latest one. We need to save the `poem` again because
                     # the editorial won't exist until the poem exists.
                     poem.editorial = editorial
-                    poem.save()
+                    poem.save(
+                        update_fields=[
+                            "editorial", "editorial_status", "editorial_timing"
+                        ]
+                    )
 
                     # Copy data about last update. This results in an extra
                     # call to the database, but we do this to avoid the
@@ -402,6 +410,18 @@ class Command(BaseCommand):
 
                     print(" done")
 
+    def count_approved_poems(self):
+        # Editorial decisions are imported directly, so the approved poem
+        # counts of authors, and the counts of poems by editorial status,
+        # need to be counted afterwards.
+        print("Counting approved poems of authors...", end="", flush=True)
+        Author.objects.all().rebuild_approved_poem_counts()
+        print(" done")
+
+        print("Counting poems by editorial status...", end="", flush=True)
+        EditorialStatusCount.objects.rebuild()
+        print(" done")
+
     def import_day_poem(self):
         existing_daypoems = "'%s'" % "','".join(
             [
@@ -410,6 +430,18 @@ class Command(BaseCommand):
             ]
         )
 
+        # The original website allowed several daily poems on the same day.
+        # They are numbered from 1 after the first one of each day, as done by
+        # migration `poem.0031_daypoem_unique_day`, continuing from the daily
+        # poems already imported.
+        duplicate_numbers = {
+            day: max_number + 1
+            for day, max_number in DayPoem.objects.order_by()
+            .values("day")
+            .annotate(Max("duplicate_number"))
+            .values_list("day", "duplicate_number__max")
+        }
+
         with self.connection.cursor() as cursor:
             cursor.execute(
                 """
@@ -432,6 +464,10 @@ class Command(BaseCommand):
                 daypoem.poem_id = int(row["poem"])
                 daypoem.day = awarize(row["day"])
 
+                day = daypoem.day.date()
+                daypoem.duplicate_number = duplicate_numbers.get(day, 0)
+                duplicate_numbers[day] = daypoem.duplicate_number + 1
+
                 print("Saving daypoem for %s..." % row["day"], end="", flush=True)
                 daypoem.save()
                 print(" done")
@@ -0,0 +1,28 @@
+from core.frontpage import frontpage_cache_key
+from core.views import render_anonymous_main
+from datetime import timedelta
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+# Renders the front page of the next day into the "pages" cache, so that the
+# first visitors after midnight don't have to wait for it. Meant to be run
+# shortly before midnight, for example with cron:
+#
+#     55 23 * * * /path/to/manage.py render_frontpage
+#
+# The page of the current day can be rendered instead with `--today`.
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--today", action="store_true")
+
+    def handle(self, *args, **options):
+        day = timezone.localdate()
+        if not options["today"]:
+            day += timedelta(days=1)
+
+        print("Rendering front page for %s..." % day, end="", flush=True)
+        caches["pages"].set(frontpage_cache_key(day), render_anonymous_main(day))
+        print(" done")
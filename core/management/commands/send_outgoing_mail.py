@@ -0,0 +1,107 @@
+import time
+from core.mail import build_mail
+from core.models import OutgoingMail
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.utils import timezone
+
+# Sends the emails queued in the `OutgoingMail` table, over a single
+# connection to the mail server for as long as there is something to send.
+# Emails that can't be sent are retried later, with the delay doubling after
+# every failed attempt, until `MAIL_OUTBOX_MAX_ATTEMPTS` is reached.
+#
+# Meant to be run either frequently, for example every minute with cron:
+#
+#     * * * * * /path/to/manage.py send_outgoing_mail
+#
+# or continuously as a service, with `--loop`.
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep checking for new emails every `MAIL_OUTBOX_POLL_INTERVAL` seconds.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            while self.send_due():
+                pass
+
+            if not options["loop"]:
+                break
+
+            time.sleep(settings.MAIL_OUTBOX_POLL_INTERVAL)
+
+    # Postpones the next attempt to send the email while it is being sent, so
+    # that other workers running at the same time leave it alone. If this
+    # worker dies while sending, the email is attempted again afterwards.
+    def claim(self, mail):
+        claimed = OutgoingMail.objects.filter(
+            pk=mail.pk, sent=None, next_attempt=mail.next_attempt
+        ).update(
+            next_attempt=timezone.now()
+            + timedelta(seconds=settings.MAIL_OUTBOX_CLAIM_SECONDS)
+        )
+        return claimed == 1
+
+    # Sends one batch of due emails. Returns the number of emails attempted,
+    # which is zero when there is nothing left to do.
+    def send_due(self):
+        mails = list(OutgoingMail.objects.due()[: settings.MAIL_OUTBOX_BATCH_SIZE])
+        if len(mails) == 0:
+            return 0
+
+        print("Sending %d emails..." % len(mails), end="", flush=True)
+
+        sent_count = 0
+        failed_count = 0
+
+        connection = get_connection()
+        try:
+            for mail in mails:
+                if not self.claim(mail):
+                    continue
+
+                try:
+                    # Does nothing if the connection is already open.
+                    connection.open()
+
+                    build_mail(
+                        mail.subject,
+                        mail.message,
+                        mail.from_email,
+                        mail.recipient_list(),
+                        connection=connection,
+                    ).send()
+                except Exception as e:
+                    attempts = mail.attempts + 1
+                    delay = settings.MAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+                    OutgoingMail.objects.filter(pk=mail.pk).update(
+                        attempts=attempts,
+                        next_attempt=timezone.now() + timedelta(seconds=delay),
+                        last_error=repr(e),
+                    )
+                    failed_count += 1
+
+                    # The connection may be broken, so a new one is opened
+                    # for the next email.
+                    connection.close()
+                else:
+                    OutgoingMail.objects.filter(pk=mail.pk).update(
+                        attempts=F("attempts") + 1,
+                        sent=timezone.now(),
+                        last_error=None,
+                    )
+                    sent_count += 1
+        finally:
+            connection.close()
+
+        print(" done (%d sent, %d failed)" % (sent_count, failed_count))
+
+        return len(mails)
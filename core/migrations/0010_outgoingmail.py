@@ -0,0 +1,48 @@
+# Generated by Django 5.1 on 2026-10-18 09:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_alter_user_contact_postal_code"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutgoingMail",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subject", models.CharField(max_length=255)),
+                ("message", models.TextField()),
+                ("from_email", models.CharField(max_length=254)),
+                ("recipients", models.TextField()),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                (
+                    "next_attempt",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("last_error", models.TextField(blank=True, null=True)),
+                ("sent", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["sent", "next_attempt"],
+                        name="core_outgoi_sent_b987fe_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.urls import reverse
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -23,3 +25,47 @@ class User(AbstractUser):
 
     def get_absolute_url(self):
         return reverse("user", args=(self.username,))
+
+
+class OutgoingMailQuerySet(models.QuerySet):
+    # Emails that should be sent now, in the order they were queued. Emails
+    # that have failed `MAIL_OUTBOX_MAX_ATTEMPTS` times are given up on, but
+    # kept for inspection.
+    def due(self):
+        return self.filter(
+            sent=None,
+            next_attempt__lte=timezone.now(),
+            attempts__lt=settings.MAIL_OUTBOX_MAX_ATTEMPTS,
+        ).order_by("next_attempt", "id")
+
+
+# An email waiting to be sent by the `send_outgoing_mail` management command.
+# Emails are queued in the same transaction as whatever they are about, so
+# that they are only sent if it is committed, and so that a slow or broken
+# mail server never holds up the request. See `core.mail`.
+class OutgoingMail(models.Model):
+    objects = OutgoingMailQuerySet.as_manager()
+
+    subject = models.CharField(max_length=255)
+
+    # The message in Markdown, converted to text and HTML when sent.
+    message = models.TextField()
+
+    from_email = models.CharField(max_length=254)
+
+    # One email address per line.
+    recipients = models.TextField()
+
+    created = models.DateTimeField(auto_now_add=True)
+
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(null=True, blank=True)
+
+    sent = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["sent", "next_attempt"])]
+
+    def recipient_list(self):
+        return self.recipients.splitlines()
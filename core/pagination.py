@@ -0,0 +1,143 @@
+from datetime import date
+from datetime import datetime
+from django.core import signing
+from django.db.models import Q
+from django.http import Http404
+from django.utils.dateparse import parse_date
+from django.utils.dateparse import parse_datetime
+
+# Keyset pagination, also known as cursor pagination.
+#
+# Instead of counting rows and skipping an offset, which gets slower the
+# further the user browses and requires counting every result, each page
+# continues where the previous one left off, from a cursor containing the
+# ordering values of the previous page's last item. When the ordering is
+# covered by an index, every page is then an indexed range scan of the same
+# cost, regardless of how many results there are in total. When it isn't,
+# such as when ordering by a computed value, every page still requires the
+# database to compute and sort the values of all the items, so those should
+# be limited in number.
+#
+# Whether there are more results is determined by fetching one item more than
+# the page size, so no counting is ever needed.
+#
+# The ordering must be total, meaning that no two items may have the same
+# ordering values, which is typically ensured by ordering by ID last. The
+# ordering values may not be None.
+
+SIGNING_SALT = "core.pagination"
+
+
+class KeysetPage:
+    def __init__(self, object_list, has_more, next_cursor):
+        self.object_list = object_list
+        self.has_more = has_more
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+# Values are tagged with their type, since JSON has no notion of dates.
+def encode_value(value):
+    if isinstance(value, datetime):
+        return ["datetime", value.isoformat()]
+    elif isinstance(value, date):
+        return ["date", value.isoformat()]
+    else:
+        return ["value", value]
+
+
+def decode_value(tagged_value):
+    kind, value = tagged_value
+    if kind == "datetime":
+        return parse_datetime(value)
+    elif kind == "date":
+        return parse_date(value)
+    else:
+        return value
+
+
+# Cursors are signed so that they can't be tampered with to produce strange
+# queries.
+def encode_cursor(values):
+    return signing.dumps([encode_value(v) for v in values], salt=SIGNING_SALT)
+
+
+def decode_cursor(cursor, ordering):
+    try:
+        values = [decode_value(v) for v in signing.loads(cursor, salt=SIGNING_SALT)]
+    except (signing.BadSignature, TypeError, ValueError):
+        raise Http404
+
+    if len(values) != len(ordering):
+        raise Http404
+
+    return values
+
+
+# Gets the value of a field from an object, following relations as given in
+# the same "__"-separated way as in query lookups.
+def field_value(obj, fieldname):
+    for attribute in fieldname.split("__"):
+        obj = getattr(obj, attribute)
+    return obj
+
+
+# Produces a condition that matches only items coming after the given values
+# in the given ordering. For the ordering ["-a", "b"], that is:
+#
+#     a < a_value OR (a = a_value AND b > b_value)
+def after(ordering, values):
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        if field.startswith("-"):
+            fieldname = field[1:]
+            condition |= equal & Q(**{"%s__lt" % fieldname: value})
+        else:
+            fieldname = field
+            condition |= equal & Q(**{"%s__gt" % fieldname: value})
+        equal &= Q(**{fieldname: value})
+    return condition
+
+
+def paginate_keyset(queryset, ordering, cursor, page_size):
+    queryset = queryset.order_by(*ordering)
+
+    if cursor:
+        queryset = queryset.filter(after(ordering, decode_cursor(cursor, ordering)))
+
+    object_list = list(queryset[: page_size + 1])
+    has_more = len(object_list) > page_size
+    object_list = object_list[:page_size]
+
+    next_cursor = None
+    if has_more:
+        last = object_list[-1]
+        next_cursor = encode_cursor(
+            [field_value(last, field.lstrip("-")) for field in ordering]
+        )
+
+    return KeysetPage(object_list, has_more, next_cursor)
+
+
+# Iterates over every item in the queryset, fetching `chunk_size` items at a
+# time in the order of their IDs, each chunk continuing where the previous one
+# left off. Unlike `QuerySet.iterator()`, this doesn't rely on the database
+# driver to stream results, which MySQL's doesn't, so memory use is bounded
+# by the chunk size regardless of how many items there are.
+def iterate_keyset(queryset, chunk_size):
+    queryset = queryset.order_by("id")
+    last_id = None
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        chunk = list(chunk[:chunk_size])
+        yield from chunk
+
+        if len(chunk) < chunk_size:
+            break
+        last_id = chunk[-1].id
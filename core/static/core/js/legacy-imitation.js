@@ -10,8 +10,9 @@ design, whatever it may be.
 
 $(document).ready(function() {
     
-    // Buttons with a "href" attribute function as links.
-    $('button[href]').click(function() {
+    // Buttons with a "href" attribute function as links. This includes
+    // buttons added later, for example by "user-fragments.js".
+    $(document).on('click', 'button[href]', function() {
         location.href = $(this).attr('href');
     });
 
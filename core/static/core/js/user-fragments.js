@@ -0,0 +1,37 @@
+/*
+When pages are rendered the same for everyone (see `USER_FRAGMENTS` in the
+settings), the parts of them that depend on the user are marked with a
+"data-user-fragment" attribute. They are all fetched at once, with a single
+request, and filled in here.
+*/
+
+$(document).ready(function() {
+
+    var $placeholders = $('[data-user-fragment]');
+    if ($placeholders.length == 0) {
+        return;
+    }
+
+    // Placeholders may tell which poem or author they are about.
+    var params = {};
+    $placeholders.each(function() {
+        var $placeholder = $(this);
+        if ($placeholder.data('poem')) {
+            params.poem = $placeholder.data('poem');
+        }
+        if ($placeholder.data('author')) {
+            params.author = $placeholder.data('author');
+        }
+    });
+
+    var url = $('script[data-user-fragments-url]').data('user-fragments-url');
+    $.getJSON(url, params, function(fragments) {
+        $placeholders.each(function() {
+            var html = fragments[$(this).data('user-fragment')];
+            if (html !== null && html !== undefined) {
+                $(this).html(html);
+            }
+        });
+    });
+
+});
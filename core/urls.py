@@ -14,6 +14,9 @@ urlpatterns = [
     # Administrators, moderators and such, so that people can contact them and
     # see who is responsible for the web and its contents.
     path("team/", views.team, name="team"),
+    # The user-specific parts of pages, when pages are rendered the same for
+    # everyone. See `USER_FRAGMENTS` in the settings.
+    path("user/fragments/", views.user_fragments, name="user_fragments"),
     path("team/user/<str:username>/", views.user, name="user"),
     # Static pages rendered via markdown templates.
     path("about/<str:page>/", views.about, name="about"),
@@ -5,21 +5,35 @@ import zipfile
 from article.models import Article
 from core.forms import ProfileForm
 from core.forms import RegistrationForm
+from core.frontpage import CSRF_TOKEN_PLACEHOLDER
+from core.frontpage import frontpage_cache_key
+from core.pagination import iterate_keyset
 from datetime import datetime
+from datetime import time
+from datetime import timedelta
 from django.conf import settings
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import PasswordChangeForm
+from django.contrib.auth.models import AnonymousUser
 from django.contrib import messages
+from django.contrib.messages import get_messages
+from django.core.cache import caches
 from django.db import transaction
 from django.db.models import Q
+from django.middleware.csrf import get_token
 from django.http import Http404
+from django.http import HttpRequest
 from django.http import HttpResponse
+from django.http import JsonResponse
+from django.http import StreamingHttpResponse
 from django.shortcuts import redirect
 from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.translation import gettext as _
+from django.views.decorators.cache import never_cache
 from django_registration.backends.activation.views import (
     RegistrationView as BaseRegistrationView,
 )
@@ -28,37 +42,119 @@ from markdown2 import markdown
 from poem.forms import AuthorForm
 from poem.models import Author
 from poem.models import Poem
-from tempfile import TemporaryDirectory
 
 
-def main(request):
+def main_context(user, day):
     # Check for daily poem.
-    poem = Poem.objects.filter(daypoems__day=timezone.now().date()).first()
+    poem = Poem.objects.filter(daypoems__day=day).first()
 
-    articles = Article.objects.visible_to(request.user).filter(
-        editorial_status="published"
-    )[0 : settings.NEWEST_ARTICLE_COUNT]
+    articles = Article.objects.visible_to(user).filter(editorial_status="published")[
+        0 : settings.NEWEST_ARTICLE_COUNT
+    ]
 
     # Set news article to display if no daily poem.
     frontpage_article = None
     if poem is None:
+        day_begin = timezone.make_aware(datetime.combine(day, time.min))
         frontpage_article = Article.objects.filter(
             editorial_status="published",
-            editorial_timing__gte=timezone.now().replace(hour=0, minute=0, second=0),
-            editorial_timing__lte=timezone.now().replace(hour=23, minute=59, second=59),
+            editorial_timing__gte=day_begin,
+            editorial_timing__lt=day_begin + timedelta(days=1),
         ).first()
 
     # Authors with private paths.
     private_path_authors = Author.objects.exclude(private_path=None)
 
-    ctx = {
+    return {
         # Will be None if no daily poem.
         "poem": poem,
         "articles": articles,
         "frontpage_article": frontpage_article,
         "private_path_authors": private_path_authors,
     }
-    return render(request, "core/main.html", ctx)
+
+
+# Renders the front page of the given day, as seen by anonymous visitors,
+# with a placeholder for the CSRF token. See `core.frontpage`.
+def render_anonymous_main(day):
+    request = HttpRequest()
+    request.user = AnonymousUser()
+
+    ctx = main_context(request.user, day)
+    ctx["csrf_token"] = CSRF_TOKEN_PLACEHOLDER
+    return render_to_string("core/main.html", ctx, request=request)
+
+
+def main(request):
+    day = timezone.localdate()
+
+    # Anonymous visitors are served the same page, except when they have
+    # messages waiting to be displayed.
+    if request.user.is_authenticated or len(get_messages(request)) > 0:
+        return render(request, "core/main.html", main_context(request.user, day))
+
+    cache = caches["pages"]
+    cache_key = frontpage_cache_key(day)
+    content = cache.get(cache_key)
+    if content is None:
+        content = render_anonymous_main(day)
+        cache.set(cache_key, content)
+
+    return HttpResponse(content.replace(CSRF_TOKEN_PLACEHOLDER, get_token(request)))
+
+
+# The parts of pages that depend on the user, when pages are rendered the same
+# for everyone. See `USER_FRAGMENTS` in the settings. Fragments that don't
+# apply to the user are None, in which case the page's own content stays.
+@never_cache
+def user_fragments(request):
+    fragments = {
+        "messages": render_to_string("messages.html", request=request),
+        "navigation-user": render_to_string(
+            "left-navigation.user.html", request=request
+        ),
+        "navigation-login": render_to_string(
+            "left-navigation.login.html", request=request
+        ),
+    }
+
+    poem_id = request.GET.get("poem", "")
+    if poem_id.isdigit():
+        poem = (
+            Poem.objects.select_related("author", "editorial")
+            .visible_to(request.user)
+            .filter(id=poem_id)
+            .first()
+        )
+        if poem is not None:
+            ctx = {"poem": poem}
+            if request.user.is_authenticated and poem.author.user_id == request.user.id:
+                fragments["poem-side"] = render_to_string(
+                    "poem/side.control.html", ctx, request=request
+                )
+                fragments["poem-buttons"] = None
+            else:
+                fragments["poem-side"] = None
+                fragments["poem-buttons"] = render_to_string(
+                    "poem/side.buttons.html", ctx, request=request
+                )
+
+    author_id = request.GET.get("author", "")
+    if author_id.isdigit() and request.user.is_authenticated:
+        author = Author.objects.managed_by(request.user).filter(id=author_id).first()
+        fragments["author-control"] = None
+        if author is not None:
+            ctx = {
+                "author": author,
+                "poems": author.poems.exclude(editorial_status="approved")
+                .only("name", "author_id", "editorial_status")
+                .order_by("id"),
+            }
+            fragments["author-control"] = render_to_string(
+                "poem/author.control.html", ctx, request=request
+            )
+
+    return JsonResponse(fragments)
 
 
 def team(request):
@@ -226,31 +322,34 @@ def user_delete_confirm(request):
     return redirect(reverse("logout"))
 
 
+# Receives the data of a zip file as it is being written, so that it can be
+# taken out and sent to the browser piece by piece, instead of writing the
+# whole zip file somewhere first. Since it can't seek, `zipfile` writes the
+# size of each file after its data instead of before it.
+class ZipStream:
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
 @login_required
 def retrieve_data_download(request):
-    # Plan:
-    # 1. Create temporary directory.
-    # 2. Place data in temporary directory.
-    # 3. Create zip from temporary directory.
-    # 4. Delete temporary directory.
-    # 5. Read zip file into memory.
-    # 6. Delete zip file.
-    # 7. Push zip data to browser.
-
-    # A function that imitates "zip -r <zipfile> <directory>".
-    # Provided in an answer from George V. Reilly, here:
-    # https://stackoverflow.com/questions/1855095/how-to-create-a-zip-archive-of-a-directory
-    def make_zipfile(output_filename, source_dir):
-        relroot = os.path.abspath(os.path.join(source_dir, os.pardir))
-        with zipfile.ZipFile(output_filename, "w", zipfile.ZIP_DEFLATED) as zip:
-            for root, dirs, files in os.walk(source_dir):
-                # add directory (needed for empty dirs)
-                zip.write(root, os.path.relpath(root, relroot))
-                for file in files:
-                    filename = os.path.join(root, file)
-                    if os.path.isfile(filename):  # regular files only
-                        arcname = os.path.join(os.path.relpath(root, relroot), file)
-                        zip.write(filename, arcname)
+    # The zip file is produced while it is being sent, with the poems fetched
+    # from the database a chunk at a time, so that neither the poems nor the
+    # zip file are ever held in memory or written to disk in their entirety.
+    # Only the names of the files in the zip file are kept until the end,
+    # which `zipfile` needs for the zip file's directory anyway.
 
     # Compiles user data into text that can be written directly to a file.
     def compile_user_data():
@@ -275,6 +374,24 @@ def retrieve_data_download(request):
 
         return "\r\n".join(lines)
 
+    # Compiles a poem's metadata into values that can be written as JSON.
+    def compile_poem_meta(poem):
+        def format_timing(value):
+            return value.strftime("%Y-%m-%d.%H-%M-%S") if value else value
+
+        editorial = poem.editorial
+        return {
+            "about": poem.about,
+            "editorial.status": editorial.status if editorial else None,
+            "editorial.user": (
+                editorial.user.username if editorial and editorial.user else None
+            ),
+            "editorial.timing": format_timing(editorial.timing) if editorial else None,
+            "editorial.reason": editorial.reason if editorial else None,
+            "date_created": format_timing(poem.date_created),
+            "date_updated": format_timing(poem.date_updated),
+        }
+
     # Name of the output zip file and corresponding folder.
     package_name = "%s.%s.%s" % (
         settings.INSTANCE_NAME,
@@ -282,76 +399,69 @@ def retrieve_data_download(request):
         timezone.now().strftime("%Y-%m-%d.%H-%M-%S"),
     )
 
-    # See: https://docs.python.org/3/library/tempfile.html#tempfile-examples
-    with TemporaryDirectory() as temp_dirname:
-        # Create bundle directory.
-        package_dir = os.path.join(temp_dirname, package_name)
-        os.mkdir(package_dir)
-
-        # Write user data to file.
-        user_data = compile_user_data()
-        with open(os.path.join(package_dir, "%s.txt" % _("User data")), "w") as f:
-            f.write(user_data)
-
-        # Create poem directory (inside bundle directory).
-        poems_dir = os.path.join(package_dir, _("Poems"))
-        os.mkdir(poems_dir)
-
-        # Write poems to bundle.
-        poems = Poem.objects.filter(author__user_id=request.user.id)
-        for poem in poems:
-            # Write poem text into its own text file.
-            with open(os.path.join(poems_dir, "%s.txt" % poem.name), "w") as f:
-                f.write(poem.body)
-
-        # Write poems' metadata.
-        poems_meta_fields = [
-            "about",
-            "editorial.status",
-            "editorial.user",
-            "editorial.timing",
-            "editorial.reason",
-            "date_created",
-            "date_updated",
-        ]
-        poems_meta = {}
-        for poem in poems:
-            poem_meta = {}
-            for fieldname in poems_meta_fields:
-                if "." in fieldname:
-                    # We support **one** level down for sub-fields, because
-                    # it's not worth abstracting any more than that.
-                    # Feel free to improve.
-                    loc = fieldname.find(".")
-                    fieldvalue = getattr(
-                        getattr(poem, fieldname[:loc]), fieldname[loc + 1 :]
+    # Everything that depends on the request is figured out before the
+    # response starts.
+    user_data = compile_user_data()
+    user_data_filename = "%s/%s.txt" % (package_name, _("User data"))
+    poems_dirname = "%s/%s" % (package_name, _("Poems"))
+    poems_meta_filename = "%s/%s.json" % (package_name, _("Poem metadata"))
+
+    poems = Poem.objects.filter(author__user_id=request.user.id)
+
+    def generate_zip():
+        stream = ZipStream()
+        with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as zip:
+            zip.writestr(user_data_filename, user_data)
+            yield stream.take()
+
+            # Write each poem's text into its own text file. Poems with the
+            # same name are numbered, so that they don't end up in files of
+            # the same name.
+            names = {}
+            used_names = set()
+            for poem in iterate_keyset(poems.only("name", "body"), 100):
+                name = poem.name.replace("/", "-")
+                number = 1
+                while name in used_names:
+                    number += 1
+                    name = "%s (%d)" % (poem.name.replace("/", "-"), number)
+                names[poem.id] = name
+                used_names.add(name)
+
+                zip.writestr("%s/%s.txt" % (poems_dirname, name), poem.body)
+                yield stream.take()
+
+            # Write poems' metadata, as one JSON object with the poems'
+            # names as keys, formatted as if it had been written all at once.
+            poems_meta = poems.select_related("editorial__user").defer("body")
+            with zip.open(poems_meta_filename, "w") as f:
+                separator = "{"
+                for poem in iterate_keyset(poems_meta, 100):
+                    # Skip poems added since their texts were written.
+                    if poem.id not in names:
+                        continue
+
+                    entry = "%s: %s" % (
+                        json.dumps(names[poem.id], ensure_ascii=False),
+                        json.dumps(
+                            compile_poem_meta(poem),
+                            ensure_ascii=False,
+                            sort_keys=True,
+                            indent=2,
+                        ),
                     )
-                else:
-                    fieldvalue = getattr(poem, fieldname)
-                if type(fieldvalue) is datetime:
-                    fieldvalue = fieldvalue.strftime("%Y-%m-%d.%H-%M-%S")
-                if type(fieldvalue) is str:
-                    fieldvalue = fieldvalue
-                if type(fieldvalue) is User:
-                    fieldvalue = fieldvalue.username
-                poem_meta[fieldname] = fieldvalue
-            poems_meta[poem.name] = poem_meta
-        with open(os.path.join(package_dir, "%s.json" % _("Poem metadata")), "w") as f:
-            f.write(
-                json.dumps(poems_meta, ensure_ascii=False, sort_keys=True, indent=2)
-            )
-
-        # Zip it!
-        zip_filename = "%s.zip" % package_dir
-        make_zipfile(zip_filename, package_dir)
+                    f.write(
+                        ("%s\n  %s" % (separator, entry.replace("\n", "\n  "))).encode()
+                    )
+                    separator = ","
+                    yield stream.take()
+                f.write(("{}" if separator == "{" else "\n}").encode())
 
-        # Get the content for delivery, before it vanishes, which it will do
-        # when we leave the "with TemporaryDirectory()" section.
-        with open(zip_filename, "rb") as f:
-            package_data = f.read()
+        # The zip file's directory is written when it's closed.
+        yield stream.take()
 
     # Push the content to the user as a zip file for download.
-    response = HttpResponse(package_data, content_type="application/zip")
+    response = StreamingHttpResponse(generate_zip(), content_type="application/zip")
     response["Content-Disposition"] = "attachment; filename=%s.zip" % package_name
     return response
 
@@ -12,7 +12,7 @@ class AuthorAdmin(admin.ModelAdmin):
 @admin.register(Poem)
 class PoemAdmin(admin.ModelAdmin):
     list_display = ["name", "author", "editorial"]
-    list_filter = ["editorial__status"]
+    list_filter = ["editorial_status"]
     search_fields = ["name", "body", "about", "author__name"]
     fieldsets = [
         [
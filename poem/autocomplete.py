@@ -0,0 +1,288 @@
+import threading
+from bisect import bisect_left
+from bisect import insort
+from datetime import timedelta
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Exists
+from django.db.models import OuterRef
+from django.urls import reverse
+from django.utils import timezone
+from poem.search import normalize
+
+# An in-process prefix index of the names of approved poems and the names of
+# authors with approved poems, for suggesting completions as the user types.
+#
+# Every name is stored under its normalized form (see `poem.search`), once
+# for every word it contains, in a sorted list. Entries whose key begins with
+# a given prefix are then found by a binary search, without touching the
+# database. Typing "hallgr" thus suggests "Jónas Hallgrímsson".
+#
+# Each process has its own index. Changes made within the process are applied
+# immediately by `Poem.save()` and `Author.save()`, while changes made by other
+# processes are picked up every `AUTOCOMPLETE_SYNC_INTERVAL` seconds, by
+# fetching poems and authors updated since the last synchronization. The
+# whole index is rebuilt every `AUTOCOMPLETE_REBUILD_INTERVAL` seconds, which
+# also clears out anything deleted by other processes. While one request
+# rebuilds or synchronizes the index, others keep using it as it was.
+
+
+class PrefixIndex:
+    def __init__(self):
+        # Sorted list of `(key, id)` tuples.
+        self.keys = []
+
+        # Display information by ID, as `(name, url, keys)`.
+        self.entries = {}
+
+    # Turns a name into the keys it is found by, one for every word.
+    @staticmethod
+    def name_keys(name):
+        words = normalize(name).split()
+        return [" ".join(words[i:]) for i in range(len(words))]
+
+    def add(self, id, name, url):
+        self.remove(id)
+
+        keys = PrefixIndex.name_keys(name)
+        for key in keys:
+            insort(self.keys, (key, id))
+
+        self.entries[id] = (name, url, keys)
+
+    # Builds an index from scratch out of `(id, name, url)` tuples, sorting
+    # all the keys at once instead of inserting them one by one.
+    @staticmethod
+    def build(items):
+        index = PrefixIndex()
+        for id, name, url in items:
+            keys = PrefixIndex.name_keys(name)
+            index.keys.extend((key, id) for key in keys)
+            index.entries[id] = (name, url, keys)
+        index.keys.sort()
+        return index
+
+    def remove(self, id):
+        entry = self.entries.pop(id, None)
+        if entry is None:
+            return
+
+        for key in entry[2]:
+            position = bisect_left(self.keys, (key, id))
+            if position < len(self.keys) and self.keys[position] == (key, id):
+                del self.keys[position]
+
+    def lookup(self, prefix, limit):
+        results = []
+        seen = set()
+
+        position = bisect_left(self.keys, (prefix,))
+        while position < len(self.keys) and len(results) < limit:
+            key, id = self.keys[position]
+            if not key.startswith(prefix):
+                break
+
+            # A name may match the prefix with more than one of its words.
+            if id not in seen:
+                seen.add(id)
+                name, url, keys = self.entries[id]
+                results.append({"id": id, "name": name, "url": url})
+
+            position += 1
+
+        return results
+
+
+class Autocomplete:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.poems = None
+        self.authors = None
+        self.built = None
+        self.synced = None
+
+        # Whether a thread is currently rebuilding or synchronizing the index.
+        self.refreshing = False
+
+    def update_poem(self, poem):
+        with self.lock:
+            if self.poems is not None:
+                self.apply_poem(poem.id, poem.name, poem.editorial_status == "approved")
+
+    def update_author(self, author):
+        with self.lock:
+            if self.authors is not None:
+                self.apply_author(
+                    author.id,
+                    author.name,
+                    author.get_absolute_url(),
+                    author.poems.filter(editorial_status="approved").exists(),
+                )
+
+    def remove_poems(self, ids):
+        with self.lock:
+            if self.poems is not None:
+                for id in ids:
+                    self.poems.remove(id)
+
+    def remove_author(self, id):
+        with self.lock:
+            if self.authors is not None:
+                self.authors.remove(id)
+
+    def apply_poem(self, id, name, approved):
+        if approved:
+            self.poems.add(id, name, reverse("poem", args=(id,)))
+        else:
+            self.poems.remove(id)
+
+    def apply_author(self, id, name, url, has_approved_poems):
+        if has_approved_poems:
+            self.authors.add(id, name, url)
+        else:
+            self.authors.remove(id)
+
+    # Authors annotated with whether they have any approved poems.
+    def author_queryset(self):
+        Author = apps.get_model("poem", "Author")
+        Poem = apps.get_model("poem", "Poem")
+
+        return Author.objects.annotate(
+            has_approved_poems=Exists(
+                Poem.objects.filter(
+                    author_id=OuterRef("pk"), editorial_status="approved"
+                )
+            )
+        ).only("name", "private_path")
+
+    # Builds new indexes from the database. Called without holding the lock,
+    # so that lookups can use the current indexes in the meantime. Returns a
+    # function that puts the new indexes in place of the current ones.
+    def rebuild(self):
+        Poem = apps.get_model("poem", "Poem")
+
+        now = timezone.now()
+
+        # Reversing the URL of every poem would take a while.
+        poem_url = reverse("poem", args=(0,))[:-2] + "%d/"
+
+        approved_poems = Poem.objects.filter(editorial_status="approved")
+        poems = PrefixIndex.build(
+            (poem["id"], poem["name"], poem_url % poem["id"])
+            for poem in approved_poems.values("id", "name").iterator()
+        )
+
+        authors = PrefixIndex.build(
+            (author.id, author.name, author.get_absolute_url())
+            for author in self.author_queryset().filter(has_approved_poems=True)
+        )
+
+        def apply():
+            self.poems = poems
+            self.authors = authors
+            self.built = now
+
+            # Changes made in this process while the indexes were being built
+            # are applied again by the next synchronization.
+            self.synced = now
+
+        return apply
+
+    # Fetches what has changed since the last synchronization. Like
+    # `rebuild()`, called without holding the lock, and returns a function
+    # that applies the changes.
+    def sync(self):
+        Author = apps.get_model("poem", "Author")
+        Poem = apps.get_model("poem", "Poem")
+
+        # Some overlap with the previous synchronization is allowed, so that
+        # nothing saved while it was running gets missed.
+        now = timezone.now()
+        since = self.synced - timedelta(seconds=settings.AUTOCOMPLETE_SYNC_INTERVAL)
+
+        author_ids = set(
+            Author.objects.filter(date_updated__gte=since).values_list("id", flat=True)
+        )
+
+        poems = list(
+            Poem.objects.filter(date_updated__gte=since).values(
+                "id", "name", "author_id", "editorial_status"
+            )
+        )
+
+        # A poem's approval or unapproval may affect whether its author
+        # should be suggested.
+        author_ids.update(
+            poem["author_id"] for poem in poems if poem["author_id"] is not None
+        )
+
+        authors = []
+        if len(author_ids) > 0:
+            authors = list(self.author_queryset().filter(id__in=author_ids))
+
+        def apply():
+            for poem in poems:
+                self.apply_poem(
+                    poem["id"], poem["name"], poem["editorial_status"] == "approved"
+                )
+
+            for author in authors:
+                self.apply_author(
+                    author.id,
+                    author.name,
+                    author.get_absolute_url(),
+                    author.has_approved_poems,
+                )
+
+            self.synced = now
+
+        return apply
+
+    # Rebuilds or synchronizes the indexes when it is time to, unless another
+    # thread is already doing so. The database is queried without holding
+    # the lock, so that lookups by other threads don't have to wait.
+    def refresh(self):
+        with self.lock:
+            if self.refreshing:
+                return
+
+            now = timezone.now()
+            if self.built is None or now - self.built >= timedelta(
+                seconds=settings.AUTOCOMPLETE_REBUILD_INTERVAL
+            ):
+                fetch = self.rebuild
+            elif now - self.synced >= timedelta(
+                seconds=settings.AUTOCOMPLETE_SYNC_INTERVAL
+            ):
+                fetch = self.sync
+            else:
+                return
+
+            self.refreshing = True
+
+        try:
+            apply = fetch()
+            with self.lock:
+                apply()
+        finally:
+            with self.lock:
+                self.refreshing = False
+
+    def lookup(self, prefix, limit):
+        self.refresh()
+
+        prefix = " ".join(normalize(prefix).split())
+
+        with self.lock:
+            # Nothing can be suggested until the indexes have first been
+            # built, if another thread is building them.
+            if prefix == "" or self.poems is None:
+                return {"poems": [], "authors": []}
+
+            return {
+                "poems": self.poems.lookup(prefix, limit),
+                "authors": self.authors.lookup(prefix, limit),
+            }
+
+
+autocomplete = Autocomplete()
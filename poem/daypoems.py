@@ -0,0 +1,110 @@
+import random
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError
+from django.db import transaction
+from django.db.models import Exists
+from django.db.models import Max
+from django.db.models import Min
+from django.db.models import OuterRef
+from poem.models import DayPoem
+from poem.models import Poem
+
+# Fills days that have no daily poem with approved poems picked at random, so
+# that the front page doesn't fall back to news articles when moderators
+# haven't got around to choosing one. An author is never picked if they have
+# a daily poem within `DAYPOEM_AUTHOR_INTERVAL` days of the day being filled,
+# and a poem is never picked if it has been, or will be, the daily poem
+# within `DAYPOEM_POEM_INTERVAL` years of it.
+#
+# Poems are picked by choosing a random ID and checking whether the poem with
+# that ID is eligible, which is a single primary key lookup, instead of
+# shuffling the whole table as `order_by("?")` would. Every eligible poem is
+# thus equally likely to be picked. IDs that belong to no eligible poem are
+# simply drawn again, up to `DAYPOEM_PICK_ATTEMPTS` times, after which the
+# eligible poems are counted and one of them is picked by its position.
+
+
+def shift_years(day, years):
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:
+        # February 29th in a year that has none.
+        return day.replace(year=day.year + years, day=28)
+
+
+# Picks a poem for the given day at random, avoiding the given authors.
+# Returns None if no poem is eligible.
+def pick_daypoem(day, excluded_author_ids, id_range, rng=random):
+    poem_interval = settings.DAYPOEM_POEM_INTERVAL
+    recently_used = DayPoem.objects.filter(
+        poem_id=OuterRef("pk"),
+        day__gt=shift_years(day, -poem_interval),
+        day__lt=shift_years(day, poem_interval),
+    )
+
+    candidates = (
+        Poem.objects.filter(editorial_status="approved")
+        .exclude(author=None)
+        .exclude(author_id__in=excluded_author_ids)
+        .exclude(Exists(recently_used))
+        .only("author_id", "name")
+        .order_by("id")
+    )
+
+    for attempt in range(settings.DAYPOEM_PICK_ATTEMPTS):
+        poem = candidates.filter(id=rng.randint(*id_range)).first()
+        if poem is not None:
+            return poem
+
+    count = candidates.count()
+    if count == 0:
+        return None
+    return candidates[rng.randrange(count)]
+
+
+# Fills the empty days among the `day_count` days beginning with `start`.
+# Days that are taken by someone else in the meantime are skipped. Returns
+# the created daily poems.
+def fill_daypoems(start, day_count, user=None, rng=random):
+    end = start + timedelta(days=day_count - 1)
+    author_interval = timedelta(days=settings.DAYPOEM_AUTHOR_INTERVAL)
+
+    id_range = Poem.objects.aggregate(Min("id"), Max("id"))
+    if id_range["id__min"] is None:
+        return []
+    id_range = (id_range["id__min"], id_range["id__max"])
+
+    # The authors of the daily poems that are close enough to the days being
+    # filled to matter, by day.
+    author_ids = dict(
+        DayPoem.objects.filter(
+            day__gt=start - author_interval, day__lt=end + author_interval
+        ).values_list("day", "poem__author_id")
+    )
+
+    daypoems = []
+    day = start
+    while day <= end:
+        if day not in author_ids:
+            excluded_author_ids = {
+                author_id
+                for other_day, author_id in author_ids.items()
+                if abs(other_day - day) < author_interval and author_id is not None
+            }
+
+            poem = pick_daypoem(day, excluded_author_ids, id_range, rng)
+            if poem is not None:
+                try:
+                    daypoem = DayPoem(poem=poem, day=day, editorial_user=user)
+                    with transaction.atomic():
+                        daypoem.save()
+                    daypoems.append(daypoem)
+                    author_ids[day] = poem.author_id
+                except IntegrityError:
+                    # Another moderator took the day in the meantime.
+                    pass
+
+        day += timedelta(days=1)
+
+    return daypoems
@@ -0,0 +1,14 @@
+from django.contrib.postgres.search import SearchVectorField as BaseSearchVectorField
+from django.db import models
+
+
+# PostgreSQL's `tsvector` is only available on PostgreSQL, but we don't want
+# migrations to fail on other database backends just because the model
+# exists. On other backends, the column is created as an ordinary text column
+# which is simply never used. See `poem.search.search_mode()`.
+class SearchVectorField(BaseSearchVectorField):
+    def db_type(self, connection):
+        if connection.vendor == "postgresql":
+            return super().db_type(connection)
+        else:
+            return models.TextField().db_type(connection)
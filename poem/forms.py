@@ -44,13 +44,14 @@ class DayPoemForm(forms.ModelForm):
         # daily poem. These errors are not applicable to that scenario.
         if day is not None:
             # Make sure that the requested day doesn't already have a poem.
-            if DayPoem.objects.filter(day=day).count() > 0:
+            # This is also enforced by the database.
+            if DayPoem.objects.filter(day=day).exists():
                 raise forms.ValidationError(
                     _("A poem has already been designated to the given date.")
                 )
 
             # Make sure that the given poem hasn't already been queued.
-            if DayPoem.objects.filter(poem_id=poem_id, day__gte=today).count() > 0:
+            if DayPoem.objects.filter(poem_id=poem_id, day__gte=today).exists():
                 raise forms.ValidationError(
                     _("This poem is already queued as a daily poem.")
                 )
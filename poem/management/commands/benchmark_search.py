@@ -0,0 +1,318 @@
+import random
+import statistics
+import time
+import tracemalloc
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.test.utils import override_settings
+from django.utils import timezone
+from poem.models import Author
+from poem.models import EditorialDecision
+from poem.models import Poem
+from poem.views import poems_search
+
+# Benchmarks the search over a synthetic corpus of authors and approved poems,
+# so that different search modes, and changes to them, can be compared by the
+# same numbers.
+#
+# The corpus is generated inside a transaction which is rolled back when the
+# benchmark is done, so the database is left as it was. It is still best not
+# to run this against a production database, since the generated data will
+# be visible to the database's other users while the benchmark runs.
+#
+# Example:
+#
+#     ./manage.py benchmark_search --authors 500 --poems 20000 --modes index substring
+
+FIRST_NAMES = [
+    "Anna",
+    "Arnar",
+    "Ásta",
+    "Bjarni",
+    "Birna",
+    "Davíð",
+    "Einar",
+    "Elín",
+    "Guðrún",
+    "Gunnar",
+    "Halldóra",
+    "Hallgrímur",
+    "Helga",
+    "Jón",
+    "Jónas",
+    "Katrín",
+    "Kristín",
+    "Magnús",
+    "Ólafur",
+    "Ragnheiður",
+    "Sigríður",
+    "Sigurður",
+    "Steinunn",
+    "Þóra",
+    "Þórarinn",
+    "Ævar",
+    "Örn",
+]
+
+# Father's names in the genitive, to which "son" or "dóttir" is appended.
+PATRONYMS = [
+    "Arnar",
+    "Bjarna",
+    "Einars",
+    "Gunnars",
+    "Hallgríms",
+    "Jóns",
+    "Magnúsar",
+    "Ólafs",
+    "Sigurðar",
+    "Steins",
+    "Þórs",
+    "Arnar",
+]
+
+WORDS = [
+    "ást",
+    "ástin",
+    "ástarinnar",
+    "blóm",
+    "blómið",
+    "dagur",
+    "dagsins",
+    "draumur",
+    "fjall",
+    "fjöllin",
+    "fugl",
+    "fuglarnir",
+    "haf",
+    "hafið",
+    "hjarta",
+    "hjartað",
+    "himinn",
+    "himininn",
+    "jörð",
+    "jörðin",
+    "kvöld",
+    "kvöldið",
+    "land",
+    "landið",
+    "ljóð",
+    "ljósið",
+    "máni",
+    "mánans",
+    "morgunn",
+    "nótt",
+    "nóttin",
+    "regn",
+    "sól",
+    "sólin",
+    "sorg",
+    "sorgin",
+    "stjarna",
+    "stjörnurnar",
+    "tími",
+    "tíminn",
+    "vetur",
+    "veturinn",
+    "vindur",
+    "vindurinn",
+    "vor",
+    "vorið",
+    "þögn",
+    "þögnin",
+    "ég",
+    "þú",
+    "við",
+    "og",
+    "en",
+    "í",
+    "á",
+    "um",
+    "yfir",
+    "undir",
+    "með",
+    "sem",
+    "er",
+    "var",
+    "kemur",
+    "fer",
+    "sefur",
+    "syngur",
+    "grætur",
+    "bíður",
+    "hvíslar",
+    "dreymir",
+]
+
+# A fixed mix of searches: common words, rare words, multiple words, author
+# names, a misspelling and something that doesn't exist.
+QUERIES = [
+    "ást",
+    "sólin",
+    "stjörnurnar",
+    "hvíslar",
+    "nótt og sorg",
+    "vindurinn yfir hafið",
+    "Jónas",
+    "Guðrún Sigurðardóttir",
+    "Hallgrimur",
+    "stjornurnar",
+    "xylofónn",
+]
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--authors", type=int, default=200)
+        parser.add_argument("--poems", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--modes",
+            nargs="+",
+            default=[settings.SEARCH_MODE],
+            help="Search modes to benchmark. See `SEARCH_MODE` in the settings.",
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+
+        with transaction.atomic():
+            self.generate_corpus(options["authors"], options["poems"])
+
+            for mode in options["modes"]:
+                with override_settings(SEARCH_MODE=mode):
+                    call_command("rebuild_search_index")
+                    self.benchmark(mode, options["repeat"])
+
+            transaction.set_rollback(True)
+
+    def author_name(self):
+        first_name = self.random.choice(FIRST_NAMES)
+        patronym = self.random.choice(PATRONYMS)
+        suffix = "dóttir" if first_name[-1] in "aeiíu" else "son"
+        return "%s %s%s" % (first_name, patronym, suffix)
+
+    def text(self, min_lines, max_lines):
+        lines = []
+        for i in range(self.random.randint(min_lines, max_lines)):
+            words = self.random.choices(WORDS, k=self.random.randint(3, 8))
+            lines.append(" ".join(words).capitalize())
+        return "\n".join(lines)
+
+    def generate_corpus(self, author_count, poem_count):
+        print(
+            "Generating %d authors and %d poems..." % (author_count, poem_count),
+            end="",
+            flush=True,
+        )
+
+        authors = []
+        for i in range(author_count):
+            name = self.author_name()
+            author = Author(name=name, name_dative=name)
+            author.save()
+            authors.append(author)
+
+        # Like in reality, a few authors write most of the poems. Weights
+        # follow Zipf's law.
+        weights = [1 / (rank + 1) for rank in range(author_count)]
+
+        now = timezone.now()
+        poems = []
+        for i in range(poem_count):
+            poem = Poem(
+                author=self.random.choices(authors, weights=weights)[0],
+                name=self.text(1, 1)[:150],
+                body=self.text(4, 40),
+            )
+            poem.save()
+            poems.append(poem)
+
+        # Approval is done in bulk, bypassing `Poem.set_editorial_status()`,
+        # which would send an email to each author.
+        decisions = EditorialDecision.objects.bulk_create(
+            [
+                EditorialDecision(poem=poem, status="approved", timing=now)
+                for poem in poems
+            ]
+        )
+        for poem, decision in zip(poems, decisions):
+            poem.editorial = decision
+            poem.editorial_status = decision.status
+            poem.editorial_timing = decision.timing
+        Poem.objects.bulk_update(
+            poems,
+            ["editorial", "editorial_status", "editorial_timing"],
+            batch_size=1000,
+        )
+
+        print(" done")
+
+    # Runs the given function `repeat` times for each query, and returns its
+    # timings in milliseconds, the number of database queries per run, and
+    # the peak memory allocated during a run, in KiB. Memory is measured in a
+    # separate run, since tracing allocations slows everything down.
+    def measure(self, function, repeat):
+        timings = []
+        query_counts = []
+        peak_memory = 0
+
+        for query in QUERIES:
+            for i in range(repeat):
+                # Results should be found, not remembered.
+                caches["search"].clear()
+
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    function(query)
+                    timings.append((time.perf_counter() - start) * 1000)
+
+                query_counts.append(len(queries))
+
+            caches["search"].clear()
+            tracemalloc.start()
+            function(query)
+            peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+        return timings, query_counts, peak_memory / 1024
+
+    def benchmark(self, mode, repeat):
+        def search(query):
+            poems = Poem.objects.filter(editorial_status="approved")
+            return list(poems.search(query)[: settings.SEARCH_PAGE_SIZE])
+
+        request_factory = RequestFactory()
+
+        def view(query):
+            request = request_factory.get("/poems/search/", {"q": query})
+            request.user = AnonymousUser()
+            return poems_search(request)
+
+        print()
+        print('Search mode "%s", %d runs per query:' % (mode, repeat))
+        print(
+            "  %-20s %9s %9s %9s %9s %12s"
+            % ("", "p50 ms", "p95 ms", "p99 ms", "queries", "memory KiB")
+        )
+        for name, function in [("PoemQuerySet.search", search), ("poems_search", view)]:
+            timings, query_counts, peak_memory = self.measure(function, repeat)
+            percentiles = statistics.quantiles(timings, n=100)
+            print(
+                "  %-20s %9.2f %9.2f %9.2f %9.1f %12.0f"
+                % (
+                    name,
+                    percentiles[49],
+                    percentiles[94],
+                    percentiles[98],
+                    statistics.mean(query_counts),
+                    peak_memory,
+                )
+            )
@@ -0,0 +1,30 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from poem.daypoems import fill_daypoems
+
+# Fills the upcoming days that have no daily poem with approved poems picked
+# at random (see `poem.daypoems`). Starts with the next day, so that today's
+# front page isn't changed from under its visitors, unless `--today` is given.
+# Meant to be run daily, before `render_frontpage`, for example with cron:
+#
+#     50 23 * * * /path/to/manage.py fill_daypoems
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.DAYPOEM_FILL_DAYS)
+        parser.add_argument("--today", action="store_true")
+
+    def handle(self, *args, **options):
+        start = timezone.localdate()
+        if not options["today"]:
+            start += timedelta(days=1)
+
+        print("Filling empty days from %s..." % start, end="", flush=True)
+        daypoems = fill_daypoems(start, options["days"])
+        print(" done")
+
+        for daypoem in daypoems:
+            print("%s: %s (%d)" % (daypoem.day, daypoem.poem.name, daypoem.poem_id))
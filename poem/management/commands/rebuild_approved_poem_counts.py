@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from poem.models import Author
+
+# Recounts every author's approved poems and when the latest one was approved.
+# These are normally maintained automatically as editorial decisions are
+# made, so this is only needed if they have been bypassed, for example by
+# changing editorial decisions directly in the database.
+
+
+class Command(BaseCommand):
+    def handle(self, *args, **kwargs):
+        print("Counting approved poems of authors...", end="", flush=True)
+        Author.objects.all().rebuild_approved_poem_counts()
+        print(" done")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from poem.models import EditorialStatusCount
+
+# Recounts the poems in every editorial status. These are normally maintained
+# automatically as editorial decisions are made, so this is only needed if
+# they have been bypassed, for example by changing editorial decisions
+# directly in the database.
+
+
+class Command(BaseCommand):
+    def handle(self, *args, **kwargs):
+        print("Counting poems by editorial status...", end="", flush=True)
+        EditorialStatusCount.objects.rebuild()
+        print(" done")
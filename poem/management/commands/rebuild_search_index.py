@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from poem.models import Poem
+from poem.models import PoemSearchVector
+from poem.models import SearchTerm
+from poem.models import SearchTrigram
+from poem.search import search_mode
+
+# Rebuilds the search index of the current search mode from scratch. The
+# index is normally maintained automatically as poems are saved, so this is
+# only needed when populating it for the first time, after switching search
+# modes, or after changing the tokenization or weights in `poem.search`.
+
+
+class Command(BaseCommand):
+    def handle(self, *args, **kwargs):
+        mode = search_mode()
+        if mode == "index":
+            index = SearchTerm.objects.all()
+        elif mode == "postgresql":
+            index = PoemSearchVector.objects.all()
+        else:
+            print('Search mode "%s" has no index to rebuild.' % mode)
+            return
+
+        poems = Poem.objects.select_related("author", "editorial").filter(
+            editorial_status="approved"
+        )
+
+        with transaction.atomic():
+            print('Clearing "%s" search index...' % mode, end="", flush=True)
+            index.delete()
+            SearchTrigram.objects.all().delete()
+            print(" done")
+
+            print("Indexing %d poems..." % poems.count(), end="", flush=True)
+            for poem in poems.iterator():
+                poem.update_search_index()
+            print(" done")
@@ -0,0 +1,41 @@
+# Generated by Django 5.1 on 2026-10-18 08:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("poem", "0022_alter_author_user"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchTerm",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=100)),
+                ("weight", models.PositiveIntegerField(default=0)),
+                (
+                    "poem",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_terms",
+                        to="poem.poem",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("term", "poem")},
+            },
+        ),
+    ]
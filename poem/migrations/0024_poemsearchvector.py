@@ -0,0 +1,47 @@
+# Generated by Django 5.1 on 2026-10-18 08:44
+
+import django.db.models.deletion
+import poem.fields
+from django.db import migrations, models
+
+
+# The GIN index is only meaningful on PostgreSQL, where the vector column is of
+# the type `tsvector`. See `poem.fields.SearchVectorField`.
+def create_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX poem_poemsearchvector_vector_gin"
+            " ON poem_poemsearchvector USING gin (vector)"
+        )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS poem_poemsearchvector_vector_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("poem", "0023_searchterm"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PoemSearchVector",
+            fields=[
+                (
+                    "poem",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_vector",
+                        serialize=False,
+                        to="poem.poem",
+                    ),
+                ),
+                ("vector", poem.fields.SearchVectorField()),
+            ],
+        ),
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations, models
+from poem.search import normalize
+
+
+def populate_normalized_names(apps, schema_editor):
+    Author = apps.get_model("poem", "Author")
+    Poem = apps.get_model("poem", "Poem")
+
+    for author in Author.objects.only("name", "name_dative").iterator():
+        author.name_normalized = normalize(author.name)[:100]
+        author.name_dative_normalized = normalize(author.name_dative)[:100]
+        author.save(update_fields=["name_normalized", "name_dative_normalized"])
+
+    for poem in Poem.objects.only("name").iterator():
+        poem.name_normalized = normalize(poem.name)[:150]
+        poem.save(update_fields=["name_normalized"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("poem", "0024_poemsearchvector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="author",
+            name="name_normalized",
+            field=models.CharField(
+                db_index=True, default="", editable=False, max_length=100
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="author",
+            name="name_dative_normalized",
+            field=models.CharField(
+                db_index=True, default="", editable=False, max_length=100
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="poem",
+            name="name_normalized",
+            field=models.CharField(
+                db_index=True, default="", editable=False, max_length=150
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_normalized_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1 on 2026-10-18 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("poem", "0025_normalized_names"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchTrigram",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("trigram", models.CharField(max_length=3)),
+                ("word", models.CharField(max_length=100)),
+            ],
+            options={
+                "unique_together": {("trigram", "word")},
+            },
+        ),
+    ]
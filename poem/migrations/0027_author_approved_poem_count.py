@@ -0,0 +1,47 @@
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_approved_poem_counts(apps, schema_editor):
+    Author = apps.get_model("poem", "Author")
+    Poem = apps.get_model("poem", "Poem")
+
+    approved_poems = (
+        Poem.objects.filter(author_id=OuterRef("pk"), editorial__status="approved")
+        .order_by()
+        .values("author_id")
+    )
+    Author.objects.update(
+        approved_poem_count=Coalesce(
+            Subquery(approved_poems.annotate(count=Count("id")).values("count")), 0
+        ),
+        last_approved=Subquery(
+            approved_poems.annotate(last_approved=Max("editorial__timing")).values(
+                "last_approved"
+            )
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("poem", "0026_searchtrigram"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="author",
+            name="approved_poem_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="author",
+            name="last_approved",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_approved_poem_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+STATUSES = ["unpublished", "trashed", "pending", "rejected", "approved"]
+
+
+def populate_editorial_status_counts(apps, schema_editor):
+    EditorialStatusCount = apps.get_model("poem", "EditorialStatusCount")
+    Poem = apps.get_model("poem", "Poem")
+
+    counts = dict(
+        Poem.objects.exclude(editorial=None)
+        .order_by()
+        .values_list("editorial__status")
+        .annotate(count=Count("id"))
+    )
+    EditorialStatusCount.objects.bulk_create(
+        [
+            EditorialStatusCount(status=status, count=counts.get(status, 0))
+            for status in STATUSES
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("poem", "0028_moderationlease"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EditorialStatusCount",
+            fields=[
+                (
+                    "status",
+                    models.CharField(max_length=20, primary_key=True, serialize=False),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(
+            populate_editorial_status_counts, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,68 @@
+from django.db import migrations, models
+from django.db.models import OuterRef
+from django.db.models import Subquery
+
+
+def populate_editorial_status(apps, schema_editor):
+    EditorialDecision = apps.get_model("poem", "EditorialDecision")
+    Poem = apps.get_model("poem", "Poem")
+
+    editorial = EditorialDecision.objects.filter(pk=OuterRef("editorial_id"))
+    Poem.objects.exclude(editorial=None).update(
+        editorial_status=Subquery(editorial.values("status")[:1]),
+        editorial_timing=Subquery(editorial.values("timing")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("poem", "0029_editorialstatuscount"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="daypoem",
+            options={"ordering": ["-editorial_timing", "-poem__editorial_timing"]},
+        ),
+        migrations.AlterModelOptions(
+            name="poem",
+            options={"ordering": ["-editorial_status", "-editorial_timing"]},
+        ),
+        migrations.AddField(
+            model_name="poem",
+            name="editorial_status",
+            field=models.CharField(
+                choices=[
+                    ("unpublished", "Unpublished"),
+                    ("trashed", "Trashed"),
+                    ("pending", "Pending approval"),
+                    ("rejected", "Rejected"),
+                    ("approved", "Approved"),
+                ],
+                editable=False,
+                max_length=20,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="poem",
+            name="editorial_timing",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(populate_editorial_status, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="poem",
+            index=models.Index(
+                fields=["editorial_status", "editorial_timing"],
+                name="poem_poem_editori_631a12_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="poem",
+            index=models.Index(
+                fields=["author", "editorial_status"],
+                name="poem_poem_author__168a56_idx",
+            ),
+        ),
+    ]
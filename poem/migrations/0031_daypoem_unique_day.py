@@ -0,0 +1,42 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# The original website allowed several daily poems on the same day. They are
+# kept, but numbered from 1 after the first one scheduled for each day, so
+# that days can be unique among the rest.
+def number_duplicate_daypoems(apps, schema_editor):
+    DayPoem = apps.get_model("poem", "DayPoem")
+
+    duplicate_days = (
+        DayPoem.objects.order_by()
+        .values("day")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .values_list("day", flat=True)
+    )
+    for day in list(duplicate_days):
+        daypoems = DayPoem.objects.filter(day=day).order_by("id")
+        for number, daypoem in enumerate(daypoems):
+            if number > 0:
+                daypoem.duplicate_number = number
+                daypoem.save(update_fields=["duplicate_number"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("poem", "0030_poem_editorial_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="daypoem",
+            name="duplicate_number",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(number_duplicate_daypoems, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name="daypoem",
+            unique_together={("day", "duplicate_number")},
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1 on 2026-10-18 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("poem", "0031_daypoem_unique_day"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="author",
+            name="date_updated",
+            field=models.DateTimeField(auto_now=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="poem",
+            name="date_updated",
+            field=models.DateTimeField(auto_now=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1 on 2026-10-18 09:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("poem", "0032_date_updated_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="searchterm",
+            index=models.Index(
+                fields=["term"],
+                name="poem_searchterm_term_pattern",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,63 @@
+import poem.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("poem", "0033_searchterm_term_pattern"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="author",
+            name="name_normalized",
+            field=models.CharField(
+                db_collation=poem.search.NORMALIZED_COLLATION,
+                db_index=True,
+                editable=False,
+                max_length=100,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="author",
+            name="name_dative_normalized",
+            field=models.CharField(
+                db_collation=poem.search.NORMALIZED_COLLATION,
+                db_index=True,
+                editable=False,
+                max_length=100,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="poem",
+            name="name_normalized",
+            field=models.CharField(
+                db_collation=poem.search.NORMALIZED_COLLATION,
+                db_index=True,
+                editable=False,
+                max_length=150,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="searchterm",
+            name="term",
+            field=models.CharField(
+                db_collation=poem.search.NORMALIZED_COLLATION, max_length=100
+            ),
+        ),
+        migrations.AlterField(
+            model_name="searchtrigram",
+            name="trigram",
+            field=models.CharField(
+                db_collation=poem.search.NORMALIZED_COLLATION, max_length=3
+            ),
+        ),
+        migrations.AlterField(
+            model_name="searchtrigram",
+            name="word",
+            field=models.CharField(
+                db_collation=poem.search.NORMALIZED_COLLATION, max_length=100
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+# The spelling of words already in the vocabulary is unknown, so their
+# normalized form is used until the `rebuild_search_index` command is run.
+def copy_words(apps, schema_editor):
+    SearchTrigram = apps.get_model("poem", "SearchTrigram")
+    SearchTrigram.objects.update(spelling=F("word"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("poem", "0034_normalized_collation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="searchtrigram",
+            name="spelling",
+            field=models.CharField(default="", max_length=100),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_words, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,73 @@
+from collections import Counter
+from core.frontpage import invalidate_frontpage
+from core.mail import queue_mail
+from datetime import timedelta
 from django.conf import settings
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.contrib.postgres.search import SearchQuery
+from django.contrib.postgres.search import SearchRank
+from django.contrib.postgres.search import SearchVector
+from django.core.cache import caches
+from django.db import IntegrityError
+from django.db import connection
 from django.db import models
 from django.db import transaction
+from django.db.models import Case
+from django.db.models import Count
+from django.db.models import Exists
+from django.db.models import F
+from django.db.models import Func
+from django.db.models import Max
+from django.db.models import Min
+from django.db.models import OuterRef
 from django.db.models import Prefetch
 from django.db.models import Q
+from django.db.models import Subquery
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models import When
+from django.db.models.functions import Cast
+from django.db.models.functions import Coalesce
+from django.db.models.functions import Greatest
 from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from django_mdmail import send_mail
+from poem.autocomplete import autocomplete
+from poem.fields import SearchVectorField
+from poem.private_paths import private_paths
+from poem.search import NORMALIZED_COLLATION
+from poem.search import VECTOR_WEIGHTS
+from poem.search import invalidate_search_cache
+from poem.search import normalize
+from poem.search import name_words
+from poem.search import poem_terms
+from poem.search import search_mode
+from poem.search import similarity
+from poem.search import spelled_terms
+from poem.search import tokenize
+from poem.search import trigrams
+from poem.search import tsquery
+
+EDITORIAL_STATUS_CHOICES = (
+    # User is still working on poem.
+    ("unpublished", _("Unpublished")),
+    # User has trashed the poem.
+    ("trashed", _("Trashed")),
+    # User has published but poem is pending approval.
+    ("pending", _("Pending approval")),
+    # Poem has been reviewed and rejected by moderator.
+    ("rejected", _("Rejected")),
+    # Poem has been approved by moderator and is visible on website.
+    ("approved", _("Approved")),
+)
+
+
+# Raised when an editorial decision can't be made on a poem, because its
+# editorial status has been changed by someone else in the meantime. See
+# `Poem.set_editorial_status()`.
+class EditorialConflict(Exception):
+    pass
 
 
 class AuthorQuerySet(models.QuerySet):
@@ -21,24 +80,36 @@ class AuthorQuerySet(models.QuerySet):
 
     def by_initial(self, letter):
         # Authors whose first initial match the given letter, accounting for
-        # culturally specific equivalents.
-
-        implies = settings.ALPHABET["is"]["implies"]
-
-        # Basic query, matching entries whose first letter matches the input.
-        q = models.Q(name__istartswith=letter)
-
-        if letter in implies:
-            for equiv in implies[letter]:
-                q |= models.Q(name__istartswith=equiv)
-
-        return self.filter(q)
+        # culturally specific equivalents. Those equivalents (for example "Á"
+        # for "A") are folded into the letter itself in `name_normalized`, so
+        # this is a single indexed range lookup.
+        return self.filter(name_normalized__startswith=normalize(letter))
 
     def with_approved_poems(self):
-        # Limits authors to those who have published poems and provides an
-        # annotated value, `poem_count`, showing their number.
-        return self.filter(poems__editorial__status="approved").annotate(
-            poem_count=models.Count("poems")
+        # Limits authors to those who have published poems. Their number is
+        # found in `approved_poem_count`, maintained by
+        # `Poem.set_editorial_status()`, so no aggregation is needed.
+        return self.filter(approved_poem_count__gt=0)
+
+    def rebuild_approved_poem_counts(self):
+        # Recounts the approved poems of the authors from scratch, in a single
+        # query, in case they have been changed by something other than
+        # `Poem.set_editorial_status()`, such as an import of data.
+        approved_poems = (
+            Poem.objects.filter(author_id=OuterRef("pk"), editorial_status="approved")
+            .order_by()
+            .values("author_id")
+        )
+        return self.update(
+            approved_poem_count=Coalesce(
+                Subquery(approved_poems.annotate(count=Count("id")).values("count")),
+                0,
+            ),
+            last_approved=Subquery(
+                approved_poems.annotate(last_approved=Max("editorial_timing")).values(
+                    "last_approved"
+                )
+            ),
         )
 
 
@@ -52,15 +123,178 @@ class PoemQuerySet(models.QuerySet):
     def visible_to(self, user):
         # NOTE: See note in `AuthorQuerySet.managed_by`.
         if user.is_authenticated:
-            return self.filter(Q(author__user=user) | Q(editorial__status="approved"))
+            return self.filter(Q(author__user=user) | Q(editorial_status="approved"))
         else:
-            return self.filter(editorial__status="approved")
+            return self.filter(editorial_status="approved")
+
+    # Claims a pending poem for the given moderator to review, for a limited
+    # time, so that no other moderator is given the same poem in the
+    # meantime. The oldest pending poem that nobody else holds a valid lease
+    # on is claimed, unless the moderator already holds one, in which case
+    # it is renewed. Returns None when there is nothing left to claim.
+    #
+    # Claiming is done with conditional writes rather than locks, so that it
+    # works the same on every database: if another moderator claims the same
+    # poem at the same time, only one of them succeeds, and the other one
+    # tries the next poem.
+    def claim_for_moderation(self, user, exclude_ids=()):
+        now = timezone.now()
+        expires = now + timedelta(seconds=settings.MODERATION_LEASE_SECONDS)
+
+        pending_poems = self.filter(editorial_status="pending")
+
+        poem = pending_poems.filter(
+            moderation_lease__user=user, moderation_lease__expires__gt=now
+        ).first()
+        if poem is not None and poem.id not in exclude_ids:
+            ModerationLease.objects.filter(poem=poem).update(expires=expires)
+            return poem
+
+        unclaimed_poems = (
+            pending_poems.filter(
+                Q(moderation_lease=None) | Q(moderation_lease__expires__lte=now)
+            )
+            .exclude(id__in=exclude_ids)
+            .order_by("editorial_timing", "id")
+        )
+        for attempt in range(settings.MODERATION_CLAIM_ATTEMPTS):
+            poem = unclaimed_poems.first()
+            if poem is None:
+                return None
+
+            # Take over an expired lease, or else create a new one.
+            expired_leases = ModerationLease.objects.filter(poem=poem, expires__lte=now)
+            if expired_leases.update(user=user, expires=expires) == 1:
+                return poem
+            try:
+                with transaction.atomic():
+                    ModerationLease.objects.create(
+                        poem=poem, user=user, expires=expires
+                    )
+                return poem
+            except IntegrityError:
+                # Someone else got there first.
+                continue
+
+        return None
+
+    # Makes the same editorial decision on every poem in the queryset, in a
+    # single transaction, with the same effects as calling
+    # `Poem.set_editorial_status()` on each of them, but with the editorial
+    # decisions created and assigned in bulk. The authors are notified by
+    # mail once the transaction has been committed. Returns the poems.
+    def bulk_set_editorial_status(
+        self, editorial_status, editorial_user, editorial_reason=None
+    ):
+        now = timezone.now()
+
+        with transaction.atomic():
+            # The poems are locked, so that no other decision can be made on
+            # them until this one is complete. Any ordering is dropped, since
+            # PostgreSQL can't lock the outer joins it may require.
+            poem_ids = list(
+                self.order_by().select_for_update().values_list("id", flat=True)
+            )
+            poems = list(
+                Poem.objects.select_related("author__user").filter(id__in=poem_ids)
+            )
+            if len(poems) == 0:
+                return poems
+
+            decisions = EditorialDecision.objects.bulk_create(
+                [
+                    EditorialDecision(
+                        poem=poem,
+                        status=editorial_status,
+                        user=editorial_user,
+                        timing=now,
+                        reason=editorial_reason,
+                    )
+                    for poem in poems
+                ],
+                batch_size=500,
+            )
+
+            # Some databases, notably MySQL, don't return the IDs of rows
+            # created in bulk, but they are easily found, since every poem
+            # received exactly one decision with this exact timing.
+            if not connection.features.can_return_rows_from_bulk_insert:
+                decision_ids = dict(
+                    EditorialDecision.objects.filter(
+                        poem_id__in=poem_ids, timing=now
+                    ).values_list("poem_id", "id")
+                )
+                for decision in decisions:
+                    decision.id = decision_ids[decision.poem_id]
+
+            changed_poems = []
+            previous_statuses = Counter()
+            for poem, decision in zip(poems, decisions):
+                was_approved = poem.editorial_status == "approved"
+                previous_statuses[poem.editorial_status] += 1
+                if was_approved != (editorial_status == "approved"):
+                    changed_poems.append(poem)
+
+                poem.editorial = decision
+                poem.editorial_status = decision.status
+                poem.editorial_timing = decision.timing
+                poem.date_updated = now
+
+            Poem.objects.bulk_update(
+                poems,
+                ["editorial", "editorial_status", "editorial_timing", "date_updated"],
+                batch_size=500,
+            )
+
+            for previous_status, count in previous_statuses.items():
+                EditorialStatusCount.objects.move(
+                    previous_status, editorial_status, count
+                )
+
+            # The rest is what `Poem.save()` and `Poem.set_editorial_status()`
+            # otherwise take care of, for poems being approved or unapproved.
+            if len(changed_poems) > 0:
+                for poem in changed_poems:
+                    poem.update_search_index()
+                    transaction.on_commit(
+                        lambda poem=poem: autocomplete.update_poem(poem)
+                    )
+
+                authors = {p.author_id: p.author for p in changed_poems if p.author}
+                Author.objects.filter(id__in=authors).rebuild_approved_poem_counts()
+                for author in authors.values():
+                    transaction.on_commit(
+                        lambda author=author: autocomplete.update_author(author)
+                    )
+
+                transaction.on_commit(invalidate_search_cache)
+                transaction.on_commit(Poem.refresh_newest)
+
+            # The poems have been dealt with, so nobody needs to hold on to
+            # them for moderation.
+            ModerationLease.objects.filter(poem_id__in=poem_ids).delete()
+
+            # Notify users about decisions.
+            for poem in poems:
+                poem.explain_editorial_decision_by_mail()
+
+        return poems
 
     def search(self, search_string):
-        # TODO: This should probably become more sophisticated in the future.
-        # For now, we replicate the functionality of the original website,
-        # which is to check whether the search string occurs in its entirety
-        # anywhere in the following fields:
+        # The search mechanism is configurable through `settings.SEARCH_MODE`.
+        # See the settings for available modes.
+        mode = search_mode()
+        if mode == "substring":
+            return self.search_substring(search_string)
+        elif mode == "postgresql":
+            return self.search_postgresql(search_string)
+        else:
+            return self.search_index(search_string)
+
+    def search_substring(self, search_string):
+        # Replicates the functionality of the original website, which is to
+        # check whether the search string occurs in its entirety anywhere in
+        # the following fields:
         #
         # * Poem name
         # * Poem body
@@ -68,14 +302,145 @@ class PoemQuerySet(models.QuerySet):
         # * Author's name
         # * Author's name in the accusative
         # * Author's about-field
+        #
+        # Names are matched against their normalized counterparts, making
+        # them case- and accent-insensitive regardless of the database.
+        #
+        # No ranking is done, but `search_rank` is provided for consistency
+        # with the other search modes.
+        #
+        # NOTE: This results in a full table scan over every poem body, so
+        # it should only be used when the search index is unavailable.
+        normalized = normalize(search_string)
+
+        return (
+            self.filter(
+                models.Q(name_normalized__contains=normalized)
+                | models.Q(body__icontains=search_string)
+                | models.Q(about__icontains=search_string)
+                | models.Q(author__name_normalized__contains=normalized)
+                | models.Q(author__name_dative_normalized__contains=normalized)
+                | models.Q(author__about__icontains=search_string)
+            )
+            .annotate(search_rank=Value(0))
+            .order_by("-search_rank", "-id")
+        )
+
+    def search_index(self, search_string):
+        # Searches the inverted index maintained in `SearchTerm`. Every word
+        # in the search string must match the beginning of some indexed term
+        # of the poem, so that for example "ást" will find both "ástin" and
+        # "ástarljóð". This accounts for the most common Icelandic
+        # inflections without a full morphological analysis, and each word
+        # becomes an indexed range lookup instead of a full table scan.
+        #
+        # Results are annotated with `search_rank`, the accumulated weight of
+        # the matching terms, and ordered by it. The ID is used as a
+        # tie-breaker, so that the ordering is total and may be paginated by
+        # keyset. See `core.pagination`.
+        terms = tokenize(search_string)
+        if len(terms) == 0:
+            # Annotated all the same, so that it may be ordered and paginated
+            # like any other result.
+            return self.none().annotate(search_rank=Value(0))
+
+        poems = self
+        matches = Q()
+        for term in terms:
+            matches |= Q(term__startswith=term)
+            poems = poems.filter(
+                id__in=SearchTerm.objects.filter(term__startswith=term).values(
+                    "poem_id"
+                )
+            )
 
-        return self.filter(
-            models.Q(name__icontains=search_string)
-            | models.Q(body__icontains=search_string)
-            | models.Q(about__icontains=search_string)
-            | models.Q(author__name__icontains=search_string)
-            | models.Q(author__name_dative__icontains=search_string)
-            | models.Q(author__about__icontains=search_string)
+        rank = (
+            SearchTerm.objects.filter(matches, poem_id=OuterRef("pk"))
+            .values("poem_id")
+            .annotate(rank=Sum("weight"))
+            .values("rank")
+        )
+
+        return poems.annotate(search_rank=Subquery(rank)).order_by(
+            "-search_rank", "-id"
+        )
+
+    def search_postgresql(self, search_string):
+        # Searches the poems' PostgreSQL search vectors, maintained in
+        # `PoemSearchVector` and backed by a GIN index. Word matching follows
+        # the same rules as `search_index()`, but ranking is done by
+        # PostgreSQL's `ts_rank` according to `poem.search.VECTOR_WEIGHTS`.
+        #
+        # The rank is cast from PostgreSQL's `real` to double precision, so
+        # that it survives the round-trip through a pagination cursor
+        # without losing precision.
+        query_string = tsquery(search_string)
+        if query_string == "":
+            # See `search_index()`.
+            return self.none().annotate(search_rank=Value(0.0))
+
+        query = SearchQuery(
+            query_string, config=settings.SEARCH_POSTGRESQL_CONFIG, search_type="raw"
+        )
+
+        return (
+            self.filter(search_vector__vector=query)
+            .annotate(
+                search_rank=Cast(
+                    SearchRank(F("search_vector__vector"), query), models.FloatField()
+                )
+            )
+            .order_by("-search_rank", "-id")
+        )
+
+
+class SearchTrigramQuerySet(models.QuerySet):
+    def add_words(self, words):
+        # Adds the given words to the vocabulary, ignoring those already in it.
+        # Expects a dictionary mapping terms to how they are spelled, such as
+        # from `poem.search.name_words()`.
+        self.bulk_create(
+            [
+                SearchTrigram(trigram=trigram, word=word, spelling=spelling)
+                for word, spelling in words.items()
+                for trigram in trigrams(word)
+            ],
+            ignore_conflicts=True,
+        )
+
+    def similar_word(self, term):
+        # Finds the word in the vocabulary most similar to the given term, as
+        # it is spelled, or None if no word is similar enough according to
+        # `settings.SEARCH_FUZZY_THRESHOLD`. The database finds the words
+        # sharing the most trigrams with the term through the trigram index,
+        # and the best one of those is picked by its similarity.
+        candidates = (
+            self.filter(trigram__in=trigrams(term))
+            .values("word", "spelling")
+            .annotate(shared=models.Count("trigram"))
+            .order_by("-shared", "word")[: settings.SEARCH_FUZZY_CANDIDATES]
+        )
+
+        best_word = None
+        best_similarity = settings.SEARCH_FUZZY_THRESHOLD
+        for candidate in candidates:
+            candidate_similarity = similarity(
+                term, candidate["word"], candidate["shared"]
+            )
+            if candidate_similarity >= best_similarity:
+                best_word = candidate["spelling"]
+                best_similarity = candidate_similarity
+
+        return best_word
+
+    def correct(self, search_string):
+        # Returns the search string with each word replaced by the most
+        # similar word in the vocabulary, spelled as it is in the names it
+        # comes from. Words for which nothing similar enough is found are left
+        # as they are.
+        return " ".join(
+            self.similar_word(term) or spelling
+            for term, spelling in spelled_terms(search_string)
         )
 
 
@@ -118,7 +483,34 @@ class Author(models.Model):
         on_delete=models.SET_NULL,
     )
 
-    date_updated = models.DateTimeField(auto_now=True, null=True, blank=True)
+    # Indexed for finding recently updated authors. See `poem.autocomplete`.
+    date_updated = models.DateTimeField(
+        auto_now=True, null=True, blank=True, db_index=True
+    )
+
+    # Case-folded and accent-folded versions of the names, for lookups that
+    # behave the same regardless of the database's collation. See
+    # `poem.search.normalize()`. They are compared exactly as they are, see
+    # `poem.search.NORMALIZED_COLLATION`. Maintained automatically on save.
+    name_normalized = models.CharField(
+        max_length=100,
+        db_index=True,
+        editable=False,
+        db_collation=NORMALIZED_COLLATION,
+    )
+    name_dative_normalized = models.CharField(
+        max_length=100,
+        db_index=True,
+        editable=False,
+        db_collation=NORMALIZED_COLLATION,
+    )
+
+    # The number of the author's approved poems and when the latest of them
+    # was approved. Maintained by `Poem.set_editorial_status()` directly in
+    # the database, and rebuilt by the `rebuild_approved_poem_counts`
+    # management command.
+    approved_poem_count = models.PositiveIntegerField(default=0, editable=False)
+    last_approved = models.DateTimeField(null=True, blank=True, editable=False)
 
     def __str__(self):
         if self.year_born is not None:
@@ -134,6 +526,99 @@ class Author(models.Model):
         else:
             return reverse("author", kwargs={"author_id": self.id})
 
+    def save(self, *args, **kwargs):
+        self.name_normalized = normalize(self.name)[:100]
+        self.name_dative_normalized = normalize(self.name_dative)[:100]
+
+        # The author's names and about-field are a part of the search index
+        # entries of every approved poem by the author, so we'll need to know
+        # if they're changing.
+        indexed_fields = ["name", "name_dative", "about"]
+
+        # Private paths are listed on the front page, along with the name and
+        # years of the author of the daily poem.
+        frontpage_fields = ["name", "year_born", "year_dead", "private_path"]
+
+        previous = None
+        if self.pk is not None:
+            previous = (
+                Author.objects.filter(pk=self.pk)
+                .values(*indexed_fields, *frontpage_fields)
+                .first()
+            )
+        indexed_changed = previous is not None and any(
+            previous[fieldname] != getattr(self, fieldname)
+            for fieldname in indexed_fields
+        )
+        if previous is None:
+            frontpage_changed = self.private_path is not None
+            private_path_changed = self.private_path is not None
+        else:
+            frontpage_changed = any(
+                previous[fieldname] != getattr(self, fieldname)
+                for fieldname in frontpage_fields
+            )
+            private_path_changed = previous["private_path"] != self.private_path
+
+        # The approved poem count may have changed in the database since this
+        # author was loaded, and must not be overwritten by an outdated value.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in ["approved_poem_count", "last_approved"]
+            ]
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            if indexed_changed:
+                approved_poems = self.poems.filter(editorial_status="approved")
+                for poem in approved_poems:
+                    poem.author = self
+                    poem.update_search_index()
+
+                transaction.on_commit(invalidate_search_cache)
+                transaction.on_commit(Poem.invalidate_newest)
+
+            if frontpage_changed:
+                transaction.on_commit(invalidate_frontpage)
+
+            if private_path_changed:
+                transaction.on_commit(private_paths.invalidate)
+
+            transaction.on_commit(lambda: autocomplete.update_author(self))
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            # The author's poems are deleted along with the author, without
+            # going through `Poem.delete()`.
+            statuses = (
+                self.poems.exclude(editorial_status=None)
+                .order_by()
+                .values_list("editorial_status")
+                .annotate(count=Count("id"))
+            )
+            for status, count in statuses:
+                EditorialStatusCount.objects.move(status, None, count)
+
+            self_id = self.id
+            poem_ids = list(
+                self.poems.filter(editorial_status="approved").values_list(
+                    "id", flat=True
+                )
+            )
+
+            result = super().delete(*args, **kwargs)
+            transaction.on_commit(lambda: autocomplete.remove_author(self_id))
+            transaction.on_commit(lambda: autocomplete.remove_poems(poem_ids))
+            transaction.on_commit(invalidate_frontpage)
+            if self.private_path is not None:
+                transaction.on_commit(private_paths.invalidate)
+
+        return result
+
     class Meta:
         ordering = ["name", "year_born"]
 
@@ -150,6 +635,14 @@ class Poem(models.Model):
     body = models.TextField(null=False, blank=False)
     about = models.TextField(null=True, blank=True)
 
+    # See `Author.name_normalized`.
+    name_normalized = models.CharField(
+        max_length=150,
+        db_index=True,
+        editable=False,
+        db_collation=NORMALIZED_COLLATION,
+    )
+
     # Current editorial status. Note that the `editorial_history` is produced
     # by the foreign key to `poem` in the EditorialDecision model. This should
     # always be the newest object found in `editorial_history`, and is here
@@ -165,11 +658,29 @@ class Poem(models.Model):
         on_delete=models.SET_NULL,
     )
 
+    # Copies of the current editorial decision's status and timing, so that
+    # poems can be filtered and ordered by them without joining the editorial
+    # decisions. They are copied from `editorial` whenever the poem is saved.
+    editorial_status = models.CharField(
+        max_length=20, choices=EDITORIAL_STATUS_CHOICES, null=True, editable=False
+    )
+    editorial_timing = models.DateTimeField(null=True, editable=False)
+
     date_created = models.DateTimeField(auto_now_add=True, null=True, blank=True)
-    date_updated = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    # Indexed for finding recently updated poems. See `poem.autocomplete`.
+    date_updated = models.DateTimeField(
+        auto_now=True, null=True, blank=True, db_index=True
+    )
 
     # This function should be used to set `editorial` and populate
     # `editorial_history` on a `poem`.
+    #
+    # The decision is made on the poem as it was when it was loaded. If its
+    # editorial status has been changed in the meantime, for example by
+    # another moderator deciding on it at the same time, nothing is changed
+    # and `EditorialConflict` is raised, so that no decision is made twice
+    # and the author is never notified twice.
     def set_editorial_status(
         self, editorial_status, editorial_user, editorial_reason=None
     ):
@@ -180,21 +691,101 @@ class Poem(models.Model):
         editorial.timing = timezone.now()
         editorial.reason = editorial_reason
 
+        previous_status = self.editorial_status
+        was_approved = previous_status == "approved"
+
         with transaction.atomic():
             # Save te editorial decision, so that it becomes of the history,
             # linked to `editorial_history` on the `poem`'s side.
             editorial.poem = self
             editorial.save()
 
-            # Save the editorial decision as the current one to the `poem`,
-            # for easy access.
+            # Make it the current decision of the `poem`, for easy access, in
+            # a single update which only succeeds if the poem still has the
+            # status it was loaded with. Otherwise, the decision above is
+            # rolled back.
+            updated = Poem.objects.filter(
+                pk=self.pk, editorial_status=previous_status
+            ).update(
+                editorial=editorial,
+                editorial_status=editorial.status,
+                editorial_timing=editorial.timing,
+                date_updated=editorial.timing,
+            )
+            if updated == 0:
+                raise EditorialConflict()
+
             self.editorial = editorial
-            self.save()
+            self.editorial_status = editorial.status
+            self.editorial_timing = editorial.timing
+            self.date_updated = editorial.timing
 
-        # Notify user about decision.
-        self.explain_editorial_decision_by_mail()
+            EditorialStatusCount.objects.move(previous_status, editorial_status)
+
+            # The poem only enters or leaves the search index, listings and
+            # autocomplete if it is being approved or unapproved, in which
+            # case cached search results may include or exclude it, and the
+            # author may start or stop being suggested by autocomplete.
+            if was_approved != (editorial_status == "approved"):
+                self.update_search_index()
+                self.update_author_approved_poem_count(
+                    1 if editorial_status == "approved" else -1
+                )
+                if self.is_upcoming_daypoem():
+                    transaction.on_commit(invalidate_frontpage)
+                transaction.on_commit(invalidate_search_cache)
+                transaction.on_commit(Poem.refresh_newest)
+                transaction.on_commit(lambda: autocomplete.update_poem(self))
+                if self.author is not None:
+                    transaction.on_commit(
+                        lambda: autocomplete.update_author(self.author)
+                    )
+
+            # Notify user about decision. The email is only queued, so that it
+            # is sent if and only if the decision is committed.
+            self.explain_editorial_decision_by_mail()
+
+    # Adjusts the author's `approved_poem_count` by the given difference. The
+    # count is updated in the database, so that concurrent decisions on the
+    # author's poems don't overwrite each other's changes.
+    def update_author_approved_poem_count(self, difference):
+        if self.author_id is None:
+            return
+
+        # The count never goes below zero, even if it has somehow become
+        # inaccurate, in which case it can be corrected with the
+        # `rebuild_approved_poem_counts` management command.
+        approved_poem_count = Greatest(F("approved_poem_count") + difference, 0)
+
+        authors = Author.objects.filter(pk=self.author_id)
+        if difference > 0:
+            authors.update(
+                approved_poem_count=approved_poem_count,
+                last_approved=self.editorial.timing,
+            )
+        else:
+            # The poem may have been the latest one approved.
+            authors.update(
+                approved_poem_count=approved_poem_count,
+                last_approved=Subquery(
+                    Poem.objects.filter(
+                        author_id=OuterRef("pk"), editorial_status="approved"
+                    )
+                    .order_by("-editorial_timing")
+                    .values("editorial_timing")[:1]
+                ),
+            )
 
     def explain_editorial_decision_by_mail(self):
+        # Only moderators' decisions are explained.
+        if self.editorial.status not in ["rejected", "approved"]:
+            return
+
+        # Imported authors, and authors whose user has been deleted, have no
+        # one to notify.
+        if self.author is None or self.author.user is None:
+            return
+
         # NOTE: This assumes only one user per author. See Author model.
         recipients = [self.author.user.email]
 
@@ -206,7 +797,7 @@ class Poem(models.Model):
                 .replace("\r", "")
             )
             message = render_to_string("poem/mail/poem_rejected.md", {"poem": self})
-            send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, recipients)
+            queue_mail(subject, message, settings.DEFAULT_FROM_EMAIL, recipients)
         elif self.editorial.status == "approved":
             subject = (
                 render_to_string("poem/mail/poem_approved_subject.txt", {"poem": self})
@@ -214,7 +805,167 @@ class Poem(models.Model):
                 .replace("\r", "")
             )
             message = render_to_string("poem/mail/poem_approved.md", {"poem": self})
-            send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, recipients)
+            queue_mail(subject, message, settings.DEFAULT_FROM_EMAIL, recipients)
+
+    # Brings the poem's entries in the search index of the current search
+    # mode up to date. Only approved poems are indexed, since those are the
+    # only ones that can be searched for. This is called automatically
+    # whenever the poem is saved, which includes every change of editorial
+    # status.
+    def update_search_index(self):
+        mode = search_mode()
+        if mode == "index":
+            self.update_search_terms()
+        elif mode == "postgresql":
+            self.update_search_vector()
+
+        # Words are never removed from the fuzzy search vocabulary, since
+        # they may still be in use by other poems. Outdated words are harmless
+        # and are cleared out by the `rebuild_search_index` command.
+        if mode != "substring" and self.editorial_status == "approved":
+            SearchTrigram.objects.add_words(name_words(self))
+
+    def update_search_terms(self):
+        with transaction.atomic():
+            self.search_terms.all().delete()
+
+            if self.editorial_status == "approved":
+                SearchTerm.objects.bulk_create(
+                    [
+                        SearchTerm(term=term, poem=self, weight=weight)
+                        for term, weight in poem_terms(self).items()
+                    ]
+                )
+
+    def update_search_vector(self):
+        with transaction.atomic():
+            PoemSearchVector.objects.filter(poem_id=self.id).delete()
+
+            if self.editorial_status == "approved":
+                fields = {
+                    "name": self.name,
+                    "body": self.body,
+                    "about": self.about,
+                    "author_name": self.author.name if self.author else None,
+                    "author_name_dative": (
+                        self.author.name_dative if self.author else None
+                    ),
+                }
+
+                # The text is tokenized by us rather than PostgreSQL, so that
+                # it is normalized in the same way as the search strings.
+                vector = None
+                for fieldname, text in fields.items():
+                    field_vector = SearchVector(
+                        Value(" ".join(tokenize(text))),
+                        config=settings.SEARCH_POSTGRESQL_CONFIG,
+                        weight=VECTOR_WEIGHTS[fieldname],
+                    )
+                    vector = field_vector if vector is None else vector + field_vector
+
+                PoemSearchVector.objects.create(poem=self, vector=vector)
+
+    def save(self, *args, **kwargs):
+        self.name_normalized = normalize(self.name)[:150]
+
+        # The editorial decision is only known to have changed if one has
+        # been assigned, which leaves it cached on the poem.
+        if Poem.editorial.is_cached(self):
+            self.editorial_status = self.editorial and self.editorial.status
+            self.editorial_timing = self.editorial and self.editorial.timing
+
+        # The editorial decision may have changed in the database since this
+        # poem was loaded, and must not be overwritten by an outdated one. It
+        # is only changed by `set_editorial_status()` and
+        # `PoemQuerySet.bulk_set_editorial_status()`, unless explicitly saved.
+        editorial_fields = ["editorial", "editorial_status", "editorial_timing"]
+        keep_editorial = not self._state.adding and kwargs.get("update_fields") is None
+        if keep_editorial:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in editorial_fields
+            ]
+
+        # Cached search results may include the poem's old name or text, or
+        # be found by them, so we'll need to know if they're changing.
+        indexed_fields = ["name", "body", "about"]
+        previous = None
+        if not self._state.adding:
+            previous = Poem.objects.filter(pk=self.pk).values(*indexed_fields).first()
+        indexed_changed = previous is not None and any(
+            previous[fieldname] != getattr(self, fieldname)
+            for fieldname in indexed_fields
+        )
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # What follows depends on the poem's actual editorial status.
+            if keep_editorial:
+                self.refresh_from_db(fields=editorial_fields)
+
+            self.update_search_index()
+            if self.is_upcoming_daypoem():
+                transaction.on_commit(invalidate_frontpage)
+            if self.editorial_status == "approved":
+                transaction.on_commit(Poem.invalidate_newest)
+                if indexed_changed:
+                    transaction.on_commit(invalidate_search_cache)
+            transaction.on_commit(lambda: autocomplete.update_poem(self))
+
+    def delete(self, *args, **kwargs):
+        # The ID is gone from the instance once it has been deleted.
+        self_id = self.id
+        approved = self.editorial_status == "approved"
+        upcoming_daypoem = self.is_upcoming_daypoem()
+
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            if self.editorial_status is not None:
+                EditorialStatusCount.objects.move(self.editorial_status, None)
+            if approved:
+                self.update_author_approved_poem_count(-1)
+            if upcoming_daypoem:
+                transaction.on_commit(invalidate_frontpage)
+            if approved:
+                transaction.on_commit(Poem.invalidate_newest)
+                transaction.on_commit(invalidate_search_cache)
+            transaction.on_commit(lambda: autocomplete.remove_poems([self_id]))
+
+        return result
+
+    # The newest approved poems, with only what is needed to list them. They
+    # are kept in the "pages" cache, shared by all worker processes, and
+    # refreshed whenever a poem is approved or unapproved, so that listing
+    # them normally requires no query at all.
+    @staticmethod
+    def newest():
+        poems = caches["pages"].get("newest_poems")
+        if poems is None:
+            poems = Poem.refresh_newest()
+        return poems
+
+    @staticmethod
+    def refresh_newest():
+        poems = list(
+            Poem.objects.select_related("author")
+            .only("name", "author__name")
+            .filter(editorial_status="approved")
+            .exclude(editorial_timing=None)
+            .order_by("-editorial_timing", "-id")[: settings.NEWEST_COUNT]
+        )
+        caches["pages"].set("newest_poems", poems)
+        return poems
+
+    @staticmethod
+    def invalidate_newest():
+        caches["pages"].delete("newest_poems")
+
+    # Whether the poem is today's daily poem or is scheduled to be one later,
+    # in which case changes to it affect the front page.
+    def is_upcoming_daypoem(self):
+        return self.daypoems.filter(day__gte=timezone.localdate()).exists()
 
     def __str__(self):
         return "%s - %s" % (self.name, self.author)
@@ -223,21 +974,109 @@ class Poem(models.Model):
         return reverse("poem", args=(self.id,))
 
     class Meta:
-        ordering = ["-editorial__status", "-editorial__timing"]
+        ordering = ["-editorial_status", "-editorial_timing"]
+        indexes = [
+            models.Index(fields=["editorial_status", "editorial_timing"]),
+            models.Index(fields=["author", "editorial_status"]),
+        ]
+
+
+# The day after the given date. Date arithmetic differs between databases.
+class NextDay(Func):
+    template = "(%(expressions)s + 1)"
+    output_field = models.DateField()
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="DATE_ADD(%(expressions)s, INTERVAL 1 DAY)",
+            **extra_context,
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="DATE(%(expressions)s, '+1 day')",
+            **extra_context,
+        )
+
+
+class DayPoemQuerySet(models.QuerySet):
+    # Finds the first day, on or after `start`, that has no daily poem, in a
+    # single query. That is `start` itself, unless it is taken, in which case
+    # it is the earliest day after a daily poem that isn't taken itself.
+    def next_free_day(self, start):
+        days = (
+            self.filter(day__gte=start)
+            .annotate(
+                next_day=NextDay("day"),
+                next_day_taken=Exists(DayPoem.objects.filter(day=OuterRef("next_day"))),
+            )
+            .aggregate(
+                first_day=Min("day"),
+                first_gap=Min("next_day", filter=Q(next_day_taken=False)),
+            )
+        )
+
+        if days["first_day"] is None or days["first_day"] > start:
+            return start
+        return days["first_gap"]
 
 
 class DayPoem(models.Model):
+    objects = DayPoemQuerySet.as_manager()
+
     poem = models.ForeignKey("Poem", related_name="daypoems", on_delete=models.CASCADE)
+
     day = models.DateField(blank=True)
 
+    # The original website allowed several daily poems on the same day. They
+    # are kept in the archive, numbered from 1 after the first one of each
+    # day. Every other daily poem has 0 here, so there is only ever one daily
+    # poem per day from then on, which is enforced by the database, so that
+    # moderators scheduling daily poems at the same time can't both take the
+    # same day.
+    duplicate_number = models.PositiveSmallIntegerField(default=0, editable=False)
+
     editorial_user = models.ForeignKey(
         settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL
     )
     editorial_timing = models.DateTimeField(auto_now_add=True, null=True, blank=True)
 
+    # The years in which there are daypoems, for navigating the archive. They
+    # are kept in the "pages" cache, shared by all worker processes, since
+    # finding them requires going through every daypoem, and the cache is
+    # cleared whenever a daypoem is saved or deleted.
+    @staticmethod
+    def years():
+        return caches["pages"].get_or_set(
+            "daypoem_years",
+            lambda: [d.year for d in DayPoem.objects.dates("day", "year")],
+        )
+
+    @staticmethod
+    def invalidate_years():
+        caches["pages"].delete("daypoem_years")
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            transaction.on_commit(DayPoem.invalidate_years)
+            transaction.on_commit(invalidate_frontpage)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            transaction.on_commit(DayPoem.invalidate_years)
+            transaction.on_commit(invalidate_frontpage)
+
+        return result
+
     class Meta:
-        unique_together = ["poem", "day"]
-        ordering = ["-editorial_timing", "-poem__editorial__timing"]
+        ordering = ["-editorial_timing", "-poem__editorial_timing"]
+        unique_together = ["day", "duplicate_number"]
 
 
 class Bookmark(models.Model):
@@ -252,19 +1091,145 @@ class Bookmark(models.Model):
         unique_together = ["user", "poem"]
 
 
-class EditorialDecision(models.Model):
-    EDITORIAL_STATUS_CHOICES = (
-        # User is still working on poem.
-        ("unpublished", _("Unpublished")),
-        # User has trashed the poem.
-        ("trashed", _("Trashed")),
-        # User has published but poem is pending approval.
-        ("pending", _("Pending approval")),
-        # Poem has been reviewed and rejected by moderator.
-        ("rejected", _("Rejected")),
-        # Poem has been approved by moderator and is visible on website.
-        ("approved", _("Approved")),
+# An entry in the inverted search index. Each row says that the given term
+# occurs in the given poem (or in the poem's author's information), with a
+# weight reflecting how relevant the occurrence is. See `poem.search`.
+#
+# NOTE: This should not be updated directly, but is maintained by the `Poem`
+# model's `update_search_index()`. It can be rebuilt from scratch with the
+# `rebuild_search_index` management command.
+class SearchTerm(models.Model):
+    term = models.CharField(max_length=100, db_collation=NORMALIZED_COLLATION)
+    poem = models.ForeignKey(
+        "poem.Poem", related_name="search_terms", on_delete=models.CASCADE
+    )
+    weight = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # The uniqueness constraint also provides the index used for looking
+        # up terms by equality, and by prefix on MySQL and SQLite. PostgreSQL
+        # can't use it for prefix lookups unless the database uses the "C"
+        # collation, so the pattern operator class index is needed there.
+        # Other databases ignore the operator class.
+        unique_together = ["term", "poem"]
+        indexes = [
+            models.Index(
+                fields=["term"],
+                name="poem_searchterm_term_pattern",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
+
+
+# The trigram index of the fuzzy search vocabulary, which consists of the
+# words in approved poems' names and their authors' names. Each row says that
+# the given word contains the given trigram. Words are normalized, so their
+# spelling is kept as well, for displaying them as corrections. Misspelled
+# search words are corrected against it by `SearchTrigramQuerySet.correct()`.
+#
+# NOTE: Like `SearchTerm`, this is maintained by the `Poem` model's
+# `update_search_index()`.
+class SearchTrigram(models.Model):
+    objects = SearchTrigramQuerySet.as_manager()
+
+    trigram = models.CharField(max_length=3, db_collation=NORMALIZED_COLLATION)
+    word = models.CharField(max_length=100, db_collation=NORMALIZED_COLLATION)
+    spelling = models.CharField(max_length=100)
+
+    class Meta:
+        # The uniqueness constraint also provides the index used for looking
+        # up words by trigram.
+        unique_together = ["trigram", "word"]
+
+
+# A poem's weighted PostgreSQL search vector, used by the "postgresql" search
+# mode. It is kept in its own table rather than on `Poem`, so that the vectors
+# aren't fetched every time a poem is.
+#
+# NOTE: Like `SearchTerm`, this is maintained by the `Poem` model's
+# `update_search_index()`. The GIN index is created by migration, and only on
+# PostgreSQL.
+class PoemSearchVector(models.Model):
+    poem = models.OneToOneField(
+        "poem.Poem",
+        primary_key=True,
+        related_name="search_vector",
+        on_delete=models.CASCADE,
+    )
+    vector = SearchVectorField()
+
+
+# A moderator's claim to review a pending poem, which expires after
+# `MODERATION_LEASE_SECONDS`, after which the poem is returned to the queue.
+# See `PoemQuerySet.claim_for_moderation()`.
+class ModerationLease(models.Model):
+    poem = models.OneToOneField(
+        "poem.Poem",
+        primary_key=True,
+        related_name="moderation_lease",
+        on_delete=models.CASCADE,
     )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="moderation_leases",
+        on_delete=models.CASCADE,
+    )
+    expires = models.DateTimeField(db_index=True)
+
+
+class EditorialStatusCountQuerySet(models.QuerySet):
+    def get_count(self, status):
+        count = self.filter(status=status).values_list("count", flat=True).first()
+        return count or 0
+
+    # Moves the given number of poems from one editorial status to another,
+    # in a single update, so that concurrent decisions don't overwrite each
+    # other's changes. Either status may be None, for poems that are given
+    # their first status or are deleted.
+    def move(self, from_status, to_status, amount=1):
+        if from_status == to_status or amount == 0:
+            return
+
+        # Like other maintained counts, these never go below zero, and can
+        # be corrected with the `rebuild_editorial_status_counts` command.
+        self.filter(status__in=[from_status, to_status]).update(
+            count=Case(
+                When(status=from_status, then=Greatest(F("count") - amount, 0)),
+                default=F("count") + amount,
+            )
+        )
+
+    # Recounts the poems in every editorial status from scratch.
+    def rebuild(self):
+        counts = dict(
+            Poem.objects.exclude(editorial_status=None)
+            .order_by()
+            .values_list("editorial_status")
+            .annotate(count=Count("id"))
+        )
+
+        with transaction.atomic():
+            for status, label in EditorialDecision.EDITORIAL_STATUS_CHOICES:
+                self.update_or_create(
+                    status=status, defaults={"count": counts.get(status, 0)}
+                )
+
+
+# The number of poems currently in each editorial status, so that the size of
+# the moderation backlog can be shown without counting poems.
+#
+# NOTE: This should not be updated directly, but is maintained by the `Poem`
+# model's `set_editorial_status()`. It can be rebuilt from scratch with the
+# `rebuild_editorial_status_counts` management command.
+class EditorialStatusCount(models.Model):
+    objects = EditorialStatusCountQuerySet.as_manager()
+
+    status = models.CharField(max_length=20, primary_key=True)
+    count = models.PositiveIntegerField(default=0)
+
+
+class EditorialDecision(models.Model):
+    EDITORIAL_STATUS_CHOICES = EDITORIAL_STATUS_CHOICES
 
     poem = models.ForeignKey(
         "poem.Poem", related_name="editorial_history", on_delete=models.CASCADE
@@ -0,0 +1,55 @@
+import threading
+from django.apps import apps
+from django.core.cache import caches
+from uuid import uuid4
+
+# An in-process set of all authors' private paths, so that the catch-all URL
+# pattern for private paths (see `poetcave.urls`) can turn away anything that
+# isn't one, such as typos and bots probing for other software, without
+# touching the database.
+#
+# Whenever a private path is set, changed or removed, a new generation is
+# stored in the "pages" cache, which is shared by all worker processes. A
+# process only consults it when a path is not found in its set, and reloads
+# the set if the generation has changed since it was loaded. Paths that are
+# found are looked up in the database regardless, so a path removed by
+# another process is harmless.
+
+
+class PrivatePaths:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.paths = None
+        self.generation = None
+
+    def current_generation(self):
+        return caches["pages"].get_or_set(
+            "private-paths-generation", lambda: uuid4().hex, timeout=None
+        )
+
+    def load(self, generation):
+        Author = apps.get_model("poem", "Author")
+
+        self.paths = set(
+            Author.objects.exclude(private_path=None).values_list(
+                "private_path", flat=True
+            )
+        )
+        self.generation = generation
+
+    def exists(self, path):
+        with self.lock:
+            if self.paths is not None and path in self.paths:
+                return True
+
+            generation = self.current_generation()
+            if self.paths is None or generation != self.generation:
+                self.load(generation)
+
+            return path in self.paths
+
+    def invalidate(self):
+        caches["pages"].set("private-paths-generation", uuid4().hex, timeout=None)
+
+
+private_paths = PrivatePaths()
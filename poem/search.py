@@ -0,0 +1,207 @@
+import hashlib
+import re
+import unicodedata
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from uuid import uuid4
+
+# Maximum length of a single indexed term. Longer words are truncated, which
+# still lets them be found by prefix.
+TERM_MAX_LENGTH = 100
+
+# A word is a run of letters and digits. Python's regular expressions are
+# Unicode-aware, so Icelandic letters such as "þ", "ð", "æ" and "ö" are
+# considered a part of words, while punctuation and underscores are not.
+WORD_PATTERN = re.compile(r"[^\W_]+")
+
+# How much an occurrence of a term in a given field counts toward a poem's
+# relevance. A match in the poem's name or the author's name is considered a
+# much better match than a match somewhere in the body of a long poem.
+FIELD_WEIGHTS = {
+    "name": 10,
+    "author_name": 8,
+    "author_name_dative": 8,
+    "about": 2,
+    "body": 1,
+    "author_about": 1,
+}
+
+
+# PostgreSQL's full-text search weights for the fields included in a poem's
+# search vector. PostgreSQL supports the weights "A" through "D", in
+# descending order of relevance.
+VECTOR_WEIGHTS = {
+    "name": "A",
+    "author_name": "B",
+    "author_name_dative": "B",
+    "about": "C",
+    "body": "D",
+}
+
+
+# Returns the search mode actually in effect, as configured by
+# `settings.SEARCH_MODE`. The "postgresql" mode falls back to the "index" mode
+# when the database is something other than PostgreSQL.
+def search_mode():
+    if settings.SEARCH_MODE == "postgresql" and connection.vendor != "postgresql":
+        return "index"
+    return settings.SEARCH_MODE
+
+
+# A translation table for `str.translate` that folds characters into their
+# unaccented equivalents, for example "á" into "a" and "ü" into "u".
+#
+# Letters that are letters in their own right in the alphabet, such as "þ",
+# "æ" and "ö" in Icelandic, are left alone, so that for example "Örn" is
+# listed under "Ö" and not under "O". Equivalents configured in the
+# alphabet's "implies" setting are folded into the letter they are implied
+# by, and "ð", which never starts a word, is folded into "d".
+#
+# Characters are resolved once, when they are first encountered.
+class FoldingTable(dict):
+    def __init__(self, alphabet):
+        super().__init__()
+
+        self.letters = set(letter.casefold() for letter in alphabet["letters"])
+
+        self.equivalents = {"ð": "d"}
+        for letter, equivs in alphabet["implies"].items():
+            for equiv in equivs:
+                self.equivalents[equiv.casefold()] = letter.casefold()
+
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+
+        if char in self.letters:
+            folded = char
+        elif char in self.equivalents:
+            folded = self.equivalents[char]
+        else:
+            folded = "".join(
+                c
+                for c in unicodedata.normalize("NFD", char)
+                if not unicodedata.combining(c)
+            )
+
+        self[codepoint] = folded
+        return folded
+
+
+folding_table = FoldingTable(settings.ALPHABET[settings.LANGUAGE_CODE])
+
+
+# Search results are cached in the "search" cache, configured in the settings.
+# Every cache key contains the current generation of the cache, which is
+# replaced whenever results may have changed, such as when a poem is approved
+# or unapproved. Entries of older generations are then never looked up again
+# and eventually expire or get evicted. A random value is used for the
+# generation rather than a counter, so that a generation evicted from the
+# cache can never come back and revive outdated entries.
+def search_cache_key(search_string, cursor):
+    cache = caches["search"]
+    generation = cache.get_or_set("generation", lambda: uuid4().hex, timeout=None)
+
+    # Search strings that are normalized into the same terms give the same
+    # results, except in the "substring" mode, which uses them as they are.
+    mode = search_mode()
+    if mode != "substring":
+        search_string = " ".join(tokenize(search_string))
+
+    digest = hashlib.md5(
+        "\n".join([mode, search_string, cursor or ""]).encode("utf-8")
+    ).hexdigest()
+
+    return "results:%s:%s" % (generation, digest)
+
+
+def invalidate_search_cache():
+    caches["search"].set("generation", uuid4().hex, timeout=None)
+
+
+# Normalizes text so that the same word is always represented in the same way,
+# regardless of how it was typed and regardless of the database's collation.
+# Icelandic text frequently arrives with decomposed accents (for example "a"
+# followed by a combining acute accent instead of "á"), which
+# NFC-normalization composes into single characters, before the text is
+# case-folded and accent-folded.
+def normalize(text):
+    if not text:
+        return ""
+    return unicodedata.normalize("NFC", text).casefold().translate(folding_table)
+
+
+# The collation of columns holding normalized text, which must be compared
+# exactly as it was normalized. MySQL's default collations ignore accents, so
+# that for example "o" would match "ö" again, while other databases compare
+# text exactly by default.
+NORMALIZED_COLLATION = "utf8mb4_bin" if connection.vendor == "mysql" else None
+
+
+# Splits text into normalized terms suitable for the search index.
+def tokenize(text):
+    return [word[:TERM_MAX_LENGTH] for word in WORD_PATTERN.findall(normalize(text))]
+
+
+# Splits text into words as they are spelled, in lower case, each along with
+# the term it is normalized into. See `tokenize()`.
+def spelled_terms(text):
+    words = WORD_PATTERN.findall(unicodedata.normalize("NFC", text).lower())
+    return [
+        (normalize(word)[:TERM_MAX_LENGTH], word[:TERM_MAX_LENGTH]) for word in words
+    ]
+
+
+# The words of the poem's name and its author's names, which make up the
+# vocabulary that misspelled search words are corrected against, as a
+# dictionary mapping their terms to how they are spelled.
+def name_words(poem):
+    words = spelled_terms(poem.name)
+    if poem.author is not None:
+        words += spelled_terms(poem.author.name)
+        words += spelled_terms(poem.author.name_dative)
+    return dict(words)
+
+
+# The trigrams of a word, that is, every sequence of three consecutive
+# characters in it. Like PostgreSQL's `pg_trgm`, the word is padded with two
+# spaces in front and one behind, so that the beginning and end of the word
+# carry more weight than its middle.
+def trigrams(word):
+    padded = "  %s " % word
+    return set(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+# How similar two words are, as a number between 0 and 1, given the number
+# of trigrams they share. This is the number of shared trigrams relative to
+# the number of distinct trigrams in both words.
+def similarity(word, other_word, shared):
+    return shared / (len(trigrams(word)) + len(trigrams(other_word)) - shared)
+
+
+# Compiles the weighted terms of the given poem, as a dictionary where the
+# keys are terms and the values are their accumulated weight.
+def poem_terms(poem):
+    author = poem.author
+    fields = {
+        "name": poem.name,
+        "body": poem.body,
+        "about": poem.about,
+        "author_name": author.name if author else None,
+        "author_name_dative": author.name_dative if author else None,
+        "author_about": author.about if author else None,
+    }
+
+    terms = {}
+    for fieldname, text in fields.items():
+        for term in tokenize(text):
+            terms[term] = terms.get(term, 0) + FIELD_WEIGHTS[fieldname]
+
+    return terms
+
+
+# Turns a search string into a raw PostgreSQL `tsquery` requiring every word,
+# where each word matches by prefix, consistent with the "index" search mode.
+# Since words consist only of letters and digits, they need no escaping.
+def tsquery(search_string):
+    return " & ".join("%s:*" % term for term in tokenize(search_string))
@@ -1,3 +1,257 @@
+from core.models import OutgoingMail
+from core.models import User
+from datetime import timedelta
+from django.core.cache import caches
 from django.test import TestCase
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from poem.models import Author
+from poem.models import DayPoem
+from poem.models import Poem
 
-# Create your tests here.
+
+class EditorialDecisionMailTests(TestCase):
+    def setUp(self):
+        self.moderator = User.objects.create(username="moderator", is_moderator=True)
+
+    def create_pending_poem(self, author):
+        poem = Poem.objects.create(author=author, name="Vorið", body="Vorið góða")
+        poem.set_editorial_status("pending", self.moderator)
+        return poem
+
+    def test_decision_is_mailed_to_author(self):
+        user = User.objects.create(username="author", email="author@example.com")
+        poem = self.create_pending_poem(Author.objects.create(user=user, name="Höf"))
+
+        poem.set_editorial_status("approved", self.moderator)
+
+        self.assertEqual(
+            list(OutgoingMail.objects.values_list("recipients", flat=True)),
+            ["author@example.com"],
+        )
+
+    def test_decision_on_author_without_user(self):
+        poem = self.create_pending_poem(Author.objects.create(name="Höf"))
+
+        poem.set_editorial_status("approved", self.moderator)
+
+        self.assertEqual(Poem.objects.get(id=poem.id).editorial_status, "approved")
+        self.assertFalse(OutgoingMail.objects.exists())
+
+    def test_batch_decision_on_author_without_user(self):
+        user = User.objects.create(username="author", email="author@example.com")
+        poems = [
+            self.create_pending_poem(Author.objects.create(name="Höf")),
+            self.create_pending_poem(Author.objects.create(user=user, name="Höf")),
+        ]
+
+        Poem.objects.filter(
+            id__in=[poem.id for poem in poems]
+        ).bulk_set_editorial_status("rejected", self.moderator, "Ekki nógu gott.")
+
+        self.assertEqual(
+            Poem.objects.filter(editorial_status="rejected").count(), len(poems)
+        )
+        self.assertEqual(OutgoingMail.objects.count(), 1)
+
+
+class DayPoemScheduleTests(TestCase):
+    def setUp(self):
+        self.moderator = User.objects.create(username="moderator", is_moderator=True)
+        self.author = Author.objects.create(name="Höf")
+        self.poem = Poem.objects.create(author=self.author, name="Vorið", body="x")
+        self.poem.set_editorial_status("approved", self.moderator)
+        self.client.force_login(self.moderator)
+        self.tomorrow = timezone.localdate() + timedelta(days=1)
+
+    def schedule(self, days=None, queue=None):
+        return self.client.post(
+            reverse("poems_daypoems_schedule_api"),
+            {"days": days or {}, "queue": queue or []},
+            content_type="application/json",
+        )
+
+    def test_queue_unapproved_poem(self):
+        self.poem.set_editorial_status("unpublished", self.moderator)
+
+        response = self.schedule(queue=[self.poem.id])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(DayPoem.objects.exists())
+
+    def test_move_and_remove_unapproved_poem(self):
+        DayPoem.objects.create(poem=self.poem, day=self.tomorrow)
+        self.poem.set_editorial_status("unpublished", self.moderator)
+
+        day = self.tomorrow + timedelta(days=1)
+        response = self.schedule(days={self.poem.id: day.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(DayPoem.objects.get().day, day)
+
+        response = self.schedule(days={self.poem.id: None})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(DayPoem.objects.exists())
+
+
+class AuthorListingTests(TestCase):
+    @override_settings(AUTHOR_PAGE_SIZE=2)
+    def test_poems_grouped_by_status_across_pages(self):
+        moderator = User.objects.create(username="moderator", is_moderator=True)
+        user = User.objects.create(username="author")
+        author = Author.objects.create(user=user, name="Höf")
+        for name, status in [
+            ("A", "approved"),
+            ("B", "pending"),
+            ("C", "approved"),
+            ("D", "unpublished"),
+            ("E", "approved"),
+        ]:
+            poem = Poem.objects.create(author=author, name=name, body="x")
+            poem.set_editorial_status(status, moderator)
+
+        self.client.force_login(user)
+        names = []
+        cursor = None
+        while True:
+            response = self.client.get(
+                reverse("author", args=[author.id]), {"after": cursor or ""}
+            )
+            names += [poem.name for poem in response.context["poems"]]
+            cursor = response.context["poems"].next_cursor
+            if cursor is None:
+                break
+
+        self.assertEqual(names, ["A", "C", "E", "B", "D"])
+
+
+@override_settings(SEARCH_MODE="index")
+class SearchCacheTests(TestCase):
+    def setUp(self):
+        caches["search"].clear()
+        moderator = User.objects.create(username="moderator", is_moderator=True)
+        author = Author.objects.create(name="Höf")
+        self.poem = Poem.objects.create(author=author, name="Vorið", body="Sól")
+        self.poem.set_editorial_status("approved", moderator)
+
+    def search(self, search_string):
+        response = self.client.get(reverse("poems_search"), {"q": search_string})
+        return [poem.id for poem in response.context["poems"]]
+
+    def test_edited_poem(self):
+        self.assertEqual(self.search("vorið"), [self.poem.id])
+
+        self.poem.name = "Haustið"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.poem.save()
+
+        self.assertEqual(self.search("vorið"), [])
+        self.assertEqual(self.search("haustið"), [self.poem.id])
+
+    def test_deleted_poem(self):
+        self.assertEqual(self.search("vorið"), [self.poem.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.poem.delete()
+
+        self.assertEqual(self.search("vorið"), [])
+
+    def test_search_without_words(self):
+        response = self.client.get(reverse("poems_search"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.search(""), [])
+        self.assertEqual(self.search("!!!"), [])
+
+
+@override_settings(USER_FRAGMENTS=True)
+class UserFragmentsTests(TestCase):
+    def setUp(self):
+        self.moderator = User.objects.create(username="moderator", is_moderator=True)
+        Author.objects.create(user=self.moderator, name="Ritstjóri")
+        self.user = User.objects.create(username="author")
+        author = Author.objects.create(user=self.user, name="Höf")
+        self.poem = Poem.objects.create(author=author, name="Vorið", body="Sól")
+        self.poem.set_editorial_status("approved", self.moderator)
+
+    def assertShared(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Cookie", response.get("Vary", ""))
+        self.assertIn("public", response["Cache-Control"])
+        self.assertNotIn("Set-Cookie", str(response.cookies))
+
+    def test_pages_are_shared(self):
+        self.client.force_login(self.user)
+        for url in [
+            reverse("poem", args=(self.poem.id,)),
+            reverse("author", args=(self.poem.author_id,)),
+            reverse("poems_newest"),
+            reverse("poems_search") + "?q=vorið",
+        ]:
+            with self.subTest(url=url):
+                self.assertShared(self.client.get(url))
+
+    def test_unapproved_poem_is_not_shared(self):
+        poem = Poem.objects.create(author=self.poem.author, name="Haust", body="Sól")
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("poem", args=(poem.id,)))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Cookie", response["Vary"])
+        self.assertNotIn("public", response.get("Cache-Control", ""))
+
+    def test_messages_are_fragments(self):
+        self.client.force_login(self.moderator)
+        today = timezone.localdate()
+        self.client.post(
+            reverse("poems_daypoems_calendar", args=(today.year, today.month)),
+            {"queue": "x"},
+        )
+
+        response = self.client.get(reverse("poem", args=(self.poem.id,)))
+        self.assertShared(response)
+        self.assertNotContains(response, 'class="message"')
+
+        fragments = self.client.get(reverse("user_fragments")).json()
+        self.assertIn('class="message"', fragments["messages"])
+
+
+class BatchModerationTests(TestCase):
+    def setUp(self):
+        self.moderator = User.objects.create(username="moderator", is_moderator=True)
+        author = Author.objects.create(name="Höf")
+        self.poem = Poem.objects.create(author=author, name="Vorið", body="Sól")
+        self.poem.set_editorial_status("pending", self.moderator)
+
+    def test_rejection_without_reason(self):
+        self.client.force_login(self.moderator)
+
+        response = self.client.post(
+            reverse("poems_moderate_batch"),
+            {"poem_id": [self.poem.id], "status": "rejected", "reason": ""},
+        )
+
+        self.assertRedirects(
+            response, reverse("poems_moderate_batch"), fetch_redirect_response=False
+        )
+        self.assertEqual(Poem.objects.get(id=self.poem.id).editorial_status, "pending")
+
+
+@override_settings(SEARCH_MODE="index", SEARCH_FUZZY=True)
+class SearchCorrectionTests(TestCase):
+    def setUp(self):
+        caches["search"].clear()
+        moderator = User.objects.create(username="moderator", is_moderator=True)
+        author = Author.objects.create(name="Hallgrímur", name_dative="Hallgrími")
+        self.poem = Poem.objects.create(author=author, name="Vorið", body="Sól")
+        self.poem.set_editorial_status("approved", moderator)
+
+    def test_correction_is_spelled_as_in_names(self):
+        response = self.client.get(reverse("poems_search"), {"q": "Hallgrimurr Vorð"})
+
+        self.assertEqual(
+            response.context["corrected_search_string"], "hallgrímur vorið"
+        )
+        self.assertEqual(
+            [poem.id for poem in response.context["poems"]], [self.poem.id]
+        )
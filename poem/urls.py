@@ -16,6 +16,14 @@ urlpatterns = [
     path("poems/author/<int:author_id>/", views.author, name="author"),
     path("poems/moderate/<int:poem_id>/", views.poems_moderate, name="poems_moderate"),
     path("poems/moderate/", views.poems_moderate, name="poems_moderate"),
+    path(
+        "poems/moderate/batch/", views.poems_moderate_batch, name="poems_moderate_batch"
+    ),
+    path(
+        "poems/moderate/batch/api/",
+        views.poems_moderate_batch_api,
+        name="poems_moderate_batch_api",
+    ),
     path(
         "poems/moderate/rejected",
         views.poems_moderate_rejected,
@@ -29,11 +37,32 @@ urlpatterns = [
         views.poem_set_daypoem,
         name="poem_set_daypoem",
     ),
+    path(
+        "poems/daypoems/calendar/<int:year>/<int:month>/",
+        views.poems_daypoems_calendar,
+        name="poems_daypoems_calendar",
+    ),
+    path(
+        "poems/daypoems/calendar/",
+        views.poems_daypoems_calendar,
+        name="poems_daypoems_calendar",
+    ),
+    path(
+        "poems/daypoems/calendar/<int:year>/<int:month>/api/",
+        views.poems_daypoems_calendar_api,
+        name="poems_daypoems_calendar_api",
+    ),
+    path(
+        "poems/daypoems/schedule/api/",
+        views.poems_daypoems_schedule_api,
+        name="poems_daypoems_schedule_api",
+    ),
     path(
         "poems/by-author/<str:letter>/", views.poems_by_author, name="poems_by_author"
     ),
     path("poems/by-author/", views.poems_by_author, name="poems_by_author"),
     path("poems/search/", views.poems_search, name="poems_search"),
+    path("poems/autocomplete/", views.poems_autocomplete, name="poems_autocomplete"),
     path("poems/<str:listing_type>/", views.poems, name="poems"),
     path("poems/", views.poems, name="poems"),
     path("bookmarks/", views.bookmarks, name="bookmarks"),
@@ -1,22 +1,48 @@
+import calendar
+import json
+from core.frontpage import invalidate_frontpage
+from core.pagination import paginate_keyset
+from datetime import date
+from datetime import datetime
 from datetime import timedelta
 from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
 from django.core.exceptions import PermissionDenied
+from django.db import IntegrityError
 from django.db import transaction
+from django.db.models import Q
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from django.forms import ValidationError
 from django.http import Http404
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect
 from django.shortcuts import render
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
 from django.utils.dateparse import parse_date
+from django.utils.translation import gettext as _
+from django.views.decorators.http import require_POST
+from poem.autocomplete import autocomplete
 from poem.forms import DayPoemForm
 from poem.forms import PoemForm
 from poem.models import Author
 from poem.models import Bookmark
 from poem.models import DayPoem
+from poem.models import EditorialConflict
+from poem.models import EditorialStatusCount
+from poem.models import ModerationLease
 from poem.models import Poem
+from poem.models import SearchTrigram
+from poem.private_paths import private_paths
+from poem.search import search_cache_key
+from poem.search import search_mode
+from poem.search import tokenize
 
 # NOTE: In the future, it may become possible for a user to have access to multiple
 # authors, for example deceased authors whose works have fallen out of copyright.
@@ -28,6 +54,42 @@ from poem.models import Poem
 # `author_slug` after having implemented a slug mechanism for authors.
 
 
+# The user whose view of the content a page is rendered for. When pages are
+# rendered the same for everyone, that's an anonymous user, and whatever else
+# the actual user gets to see is fetched separately. See `USER_FRAGMENTS` in
+# the settings.
+def content_user(request):
+    if settings.USER_FRAGMENTS:
+        return AnonymousUser()
+    return request.user
+
+
+# Lets a page rendered the same for everyone be cached and shared between
+# users, by browsers and caching proxies alike. See `content_user()`.
+#
+# Middleware, such as the one checking whether the user has accepted the terms
+# and conditions, looks up the user on every request, which would make the
+# page vary by the session cookie. Unless the session was changed, the page
+# doesn't depend on it, so it's not considered accessed.
+def shared_page(request, response):
+    if settings.USER_FRAGMENTS and not request.session.modified:
+        request.session.accessed = False
+        patch_cache_control(
+            response, public=True, max_age=settings.USER_FRAGMENTS_MAX_AGE
+        )
+    return response
+
+
+# Tells the user that their editorial decision on a poem wasn't made, because
+# someone else changed the poem's editorial status in the meantime.
+def editorial_conflict(request):
+    messages.add_message(
+        request,
+        messages.WARNING,
+        _("The poem's status was changed by someone else in the meantime."),
+    )
+
+
 @login_required
 def poem_add_edit(request, author_id=None, poem_id=None):
     # If adding a poem...
@@ -77,11 +139,18 @@ def poem_add_edit(request, author_id=None, poem_id=None):
                 # editing the content. That way, the user can try publishing
                 # it after having edited it according to the message
                 # accompanying the rejection.
-                if poem.editorial is None or (
-                    poem.editorial.status == "rejected"
+                #
+                # Saving the poem refreshes its editorial status, so this is
+                # decided on the status it actually has, even if a moderator
+                # has changed it since the form was opened.
+                if poem.editorial_status is None or (
+                    poem.editorial_status == "rejected"
                     and (old_name != poem.name or old_body != poem.body)
                 ):
-                    poem.set_editorial_status("unpublished", request.user)
+                    try:
+                        poem.set_editorial_status("unpublished", request.user)
+                    except EditorialConflict:
+                        editorial_conflict(request)
 
             # Redirect to poem.
             return redirect(reverse("poem", args=(poem.id,)))
@@ -115,9 +184,11 @@ def poem_publish(request, poem_id):
     except Poem.DoesNotExist:
         raise PermissionDenied
 
-    if poem.editorial.status == "unpublished":
-        poem.set_editorial_status("pending", request.user)
-        poem.save()
+    if poem.editorial_status == "unpublished":
+        try:
+            poem.set_editorial_status("pending", request.user)
+        except EditorialConflict:
+            editorial_conflict(request)
 
     return redirect(reverse("poem", args=(poem_id,)))
 
@@ -130,9 +201,11 @@ def poem_unpublish(request, poem_id):
         raise PermissionDenied
 
     if request.method == "POST":
-        if poem.editorial.status in ["pending", "approved"]:
-            poem.set_editorial_status("unpublished", request.user)
-            poem.save()
+        if poem.editorial_status in ["pending", "approved"]:
+            try:
+                poem.set_editorial_status("unpublished", request.user)
+            except EditorialConflict:
+                editorial_conflict(request)
 
             return redirect(reverse("poem", args=(poem_id,)))
 
@@ -150,9 +223,11 @@ def poem_untrash(request, poem_id):
     except Poem.DoesNotExist:
         raise PermissionDenied
 
-    if poem.editorial.status == "trashed":
-        poem.set_editorial_status("unpublished", request.user)
-        poem.save()
+    if poem.editorial_status == "trashed":
+        try:
+            poem.set_editorial_status("unpublished", request.user)
+        except EditorialConflict:
+            editorial_conflict(request)
 
     return redirect(reverse("poem", args=(poem_id,)))
 
@@ -160,7 +235,7 @@ def poem_untrash(request, poem_id):
 @login_required
 def bookmarks(request):
     bookmarks = Bookmark.objects.select_related("poem").filter(
-        user_id=request.user.id, poem__editorial__status="approved"
+        user_id=request.user.id, poem__editorial_status="approved"
     )
 
     ctx = {
@@ -172,7 +247,7 @@ def bookmarks(request):
 @login_required
 def bookmark_add(request, poem_id):
     try:
-        poem = Poem.objects.get(id=poem_id, editorial__status="approved")
+        poem = Poem.objects.get(id=poem_id, editorial_status="approved")
     except Poem.DoesNotExist:
         raise Http404
 
@@ -195,6 +270,10 @@ def author(request, author_id=None, private_path=None):
     # Figure out the author, regardless of whether it's being looked up by ID
     # or private path.
     if author_id is None and private_path is not None:
+        # Most paths that end up here aren't private paths at all, and are
+        # turned away without a database lookup. See `poem.private_paths`.
+        if not private_paths.exists(private_path):
+            raise Http404
         author = get_object_or_404(Author, private_path=private_path)
     elif author_id is not None and private_path is None:
         author = get_object_or_404(Author, id=author_id)
@@ -202,34 +281,50 @@ def author(request, author_id=None, private_path=None):
         # This shouldn't happen, but just in case.
         raise Http404
 
-    poems = Poem.objects.visible_to(request.user).filter(author_id=author.id)
+    # Only what the listing displays is fetched, so that the poems' bodies
+    # aren't loaded.
+    poems = (
+        Poem.objects.visible_to(content_user(request))
+        .filter(author_id=author.id)
+        .only("name", "author_id", "editorial_status")
+    )
+
+    # Poems are grouped by editorial status, with approved poems first, and
+    # listed in the order in which they got it. Prolific authors have
+    # thousands of poems, so they are listed a page at a time. Missing
+    # statuses and timings are replaced, since a page can't continue from
+    # where they would be.
+    poems = poems.annotate(
+        listed_status=Coalesce("editorial_status", Value("")),
+        listed_timing=Coalesce(
+            "editorial_timing", Value(timezone.make_aware(datetime(1970, 1, 1)))
+        ),
+    )
+    poems = paginate_keyset(
+        poems,
+        ["listed_status", "listed_timing", "id"],
+        request.GET.get("after"),
+        settings.AUTHOR_PAGE_SIZE,
+    )
 
     ctx = {
         "author": author,
         "poems": poems,
     }
-    return render(request, "poem/author.html", ctx)
+    return shared_page(request, render(request, "poem/author.html", ctx))
 
 
 def poems_newest(request):
-    poems = Poem.objects.select_related(
-        "author"
-    ).filter(
-        editorial__status="approved"
-    ).exclude(
-        editorial__timing=None
-    )[:25]
-
     ctx = {
-        "poems": poems,
+        "poems": Poem.newest(),
         "listing_type": "newest",
     }
-    return render(request, "poem/poems.html", ctx)
+    return shared_page(request, render(request, "poem/poems.html", ctx))
 
 
 def poems_daypoems(request, year=None):
     # Get the years in which there were daypoems.
-    years = [d.year for d in DayPoem.objects.dates("day", "year")]
+    years = DayPoem.years()
 
     # Redirect to the most recently available year if we don't have anything
     # specified, to reflect the location properly in the URL.
@@ -245,13 +340,16 @@ def poems_daypoems(request, year=None):
     year_begin = today.replace(year=year, month=1, day=1)
     year_end = year_begin.replace(year=year + 1) - timedelta(seconds=1)
 
-    # Get daypoems of the selected year, prefetching poems.
+    # Get daypoems of the selected year, along with only what the listing
+    # shows of their poems and authors, in a single query.
     daypoems = (
-        DayPoem.objects.prefetch_related("poem")
+        DayPoem.objects.select_related("poem__author")
+        .only("day", "poem__name", "poem__author__name_dative")
         .filter(
-            poem__editorial__status="approved", day__gte=year_begin, day__lte=year_end
+            poem__editorial_status="approved", day__gte=year_begin, day__lte=year_end
         )
         .filter(day__lte=today)
+        .order_by("-day", "-editorial_timing")
     )
 
     ctx = {
@@ -260,7 +358,7 @@ def poems_daypoems(request, year=None):
         "daypoems": daypoems,
         "listing_type": "daypoems",
     }
-    return render(request, "poem/poems.html", ctx)
+    return shared_page(request, render(request, "poem/poems.html", ctx))
 
 
 @login_required
@@ -270,30 +368,15 @@ def poem_set_daypoem(request, poem_id):
 
     # Make sure that the poem in question makes sense.
     try:
-        poem = Poem.objects.get(id=poem_id, editorial__status="approved")
+        poem = Poem.objects.get(id=poem_id, editorial_status="approved")
     except Poem.DoesNotExist:
         raise Http404
 
     today = timezone.now().date()
 
-    # Iterate through already existing future daypoems and check if the
-    # currently attempted `next_available` is actually not available. If it's
-    # not available, we try the day after that and loop. When we hit an
-    # attempt that doesn't correspond to the next existing daypoem entry, we
-    # determine that day to be the next available day and break the loop.
-    #
-    # This means that if already existing daypoems have available space
-    # between them, that space will be utilized.
-    #
-    # When we've gone through all existing future daypoems, the loop will end
-    # with the next available date being the last iteration, plus one day.
-    next_available = today  # Initial attempt is today.
-    daypoems = DayPoem.objects.filter(day__gte=next_available).order_by("day")
-    for daypoem in daypoems:
-        if daypoem.day == next_available:
-            next_available += timedelta(days=1)
-        else:
-            break
+    # The next day without a daily poem. If already existing daypoems have
+    # available space between them, that space will be utilized.
+    next_available = DayPoem.objects.next_free_day(today)
 
     # Check if poem is already a future day's poem. If so, then we don't want
     # to add a new DayPoem with the same poem. (See template.)
@@ -328,9 +411,17 @@ def poem_set_daypoem(request, poem_id):
             # should be removed. This is configured in the HTML form.
             if form.instance.day is None:
                 form.instance.delete()
-            else:
-                form.save()
-            return redirect(reverse("poem_set_daypoem", args=[poem_id]))
+                return redirect(reverse("poem_set_daypoem", args=[poem_id]))
+
+            try:
+                with transaction.atomic():
+                    form.save()
+                return redirect(reverse("poem_set_daypoem", args=[poem_id]))
+            except IntegrityError:
+                # Another moderator took the day in the meantime.
+                form.add_error(
+                    "day", _("A poem has already been designated to the given date.")
+                )
 
     ctx = {
         "form": form,
@@ -341,6 +432,208 @@ def poem_set_daypoem(request, poem_id):
     return render(request, "poem/control/set_daypoem.html", ctx)
 
 
+# Schedules many daily poems at once. `days` maps poem IDs to the days on
+# which they should be the daily poem, which moves them if they are already
+# queued, or to None, which removes them from the queue. The poems in `queue`
+# are queued on the next free days, in order, unless they already are.
+# Either everything is scheduled or nothing is. Returns the upcoming daily
+# poems of all the given poems.
+def schedule_daypoems(user, days, queue):
+    today = timezone.localdate()
+    poem_ids = set(days) | set(queue)
+
+    # Only poems that are becoming daily poems need to be approved, so that
+    # daily poems of poems unapproved since can still be moved or removed.
+    queued_ids = set(
+        DayPoem.objects.filter(poem_id__in=poem_ids, day__gte=today).values_list(
+            "poem_id", flat=True
+        )
+    )
+    new_ids = {
+        poem_id
+        for poem_id in poem_ids
+        if poem_id not in queued_ids and (poem_id in queue or days[poem_id] is not None)
+    }
+    approved_count = Poem.objects.filter(
+        id__in=new_ids, editorial_status="approved"
+    ).count()
+    if approved_count < len(new_ids):
+        raise ValidationError(_("Only approved poems can be daily poems."))
+    if any(day is not None and day < today for day in days.values()):
+        raise ValidationError(_("Daily poems can't be scheduled in the past."))
+
+    try:
+        with transaction.atomic():
+            # The poems being moved are removed from the queue first, so that
+            # they can swap days with each other.
+            DayPoem.objects.filter(poem_id__in=days, day__gte=today).delete()
+            for poem_id, day in days.items():
+                if day is not None:
+                    DayPoem.objects.create(
+                        poem_id=poem_id, day=day, editorial_user=user
+                    )
+
+            queued_ids = set(
+                DayPoem.objects.filter(poem_id__in=queue, day__gte=today).values_list(
+                    "poem_id", flat=True
+                )
+            )
+            for poem_id in queue:
+                if poem_id not in queued_ids:
+                    DayPoem.objects.create(
+                        poem_id=poem_id,
+                        day=DayPoem.objects.next_free_day(today),
+                        editorial_user=user,
+                    )
+                    queued_ids.add(poem_id)
+
+            # Deleting in bulk bypasses `DayPoem.delete()`.
+            transaction.on_commit(DayPoem.invalidate_years)
+            transaction.on_commit(invalidate_frontpage)
+    except IntegrityError:
+        # A day was already taken, possibly by another moderator scheduling
+        # at the same time.
+        raise ValidationError(
+            _("A poem has already been designated to the given date.")
+        )
+
+    return DayPoem.objects.filter(poem_id__in=poem_ids, day__gte=today).order_by("day")
+
+
+# A month of daily poems, for moderators to see what is coming up and to
+# schedule many daily poems at once. Each upcoming daily poem's day can be
+# changed or cleared, and poems can be queued by their IDs.
+@login_required
+def poems_daypoems_calendar(request, year=None, month=None):
+    if not request.user.is_moderator:
+        raise PermissionDenied
+
+    today = timezone.localdate()
+
+    # Default to the current month.
+    if year is None:
+        return redirect(
+            reverse("poems_daypoems_calendar", args=[today.year, today.month])
+        )
+
+    if month < 1 or month > 12:
+        raise Http404
+
+    if request.method == "POST":
+        try:
+            # Only changed days are scheduled, so that unchanged daily poems
+            # keep their history.
+            current_days = dict(
+                DayPoem.objects.filter(day__gte=today).values_list("poem_id", "day")
+            )
+            days = {}
+            for name, value in request.POST.items():
+                if name.startswith("day-"):
+                    poem_id = int(name[len("day-") :])
+                    day = date.fromisoformat(value) if value else None
+                    if current_days.get(poem_id) != day:
+                        days[poem_id] = day
+
+            queue = [
+                int(poem_id)
+                for poem_id in request.POST.get("queue", "").replace(",", " ").split()
+            ]
+
+            schedule_daypoems(request.user, days, queue)
+            messages.add_message(request, messages.SUCCESS, _("Daily poems scheduled."))
+        except ValidationError as e:
+            messages.add_message(request, messages.ERROR, " ".join(e.messages))
+        except ValueError:
+            messages.add_message(request, messages.ERROR, _("Invalid request."))
+
+        # Redirect so that browser won't want to re-post on reload.
+        return redirect(reverse("poems_daypoems_calendar", args=[year, month]))
+
+    # The calendar shows whole weeks, which may begin in the previous month
+    # and end in the next one.
+    weeks = calendar.Calendar().monthdatescalendar(year, month)
+    daypoems = {
+        daypoem.day: daypoem
+        for daypoem in DayPoem.objects.select_related("poem__author")
+        .only("day", "poem__name", "poem__author__name")
+        .filter(day__gte=weeks[0][0], day__lte=weeks[-1][-1])
+    }
+
+    first_day = weeks[0][6].replace(day=1)
+    previous_month = first_day - timedelta(days=1)
+    next_month = first_day + timedelta(days=31)
+
+    ctx = {
+        "month": first_day,
+        "previous_month": previous_month,
+        "next_month": next_month,
+        "today": today,
+        "weeks": [[(day, daypoems.get(day)) for day in week] for week in weeks],
+    }
+    return render(request, "poem/daypoems-calendar.html", ctx)
+
+
+# The daily poems of a month, for scripts.
+@login_required
+def poems_daypoems_calendar_api(request, year, month):
+    if not request.user.is_moderator:
+        raise PermissionDenied
+
+    if month < 1 or month > 12:
+        raise Http404
+
+    daypoems = (
+        DayPoem.objects.select_related("poem__author")
+        .only("day", "poem__name", "poem__author__name")
+        .filter(day__year=year, day__month=month)
+        .order_by("day")
+    )
+
+    return JsonResponse(
+        {
+            "daypoems": [
+                {
+                    "day": daypoem.day.isoformat(),
+                    "poem_id": daypoem.poem_id,
+                    "poem_name": daypoem.poem.name,
+                    "author_name": (
+                        daypoem.poem.author.name if daypoem.poem.author else None
+                    ),
+                }
+                for daypoem in daypoems
+            ]
+        }
+    )
+
+
+# The same as scheduling in `poems_daypoems_calendar`, for scripts. Expects a
+# JSON object with `days`, mapping poem IDs to days in ISO format or null,
+# and/or a `queue` of poem IDs. See `schedule_daypoems()`. Responds with the
+# upcoming days of the given poems.
+@login_required
+@require_POST
+def poems_daypoems_schedule_api(request):
+    if not request.user.is_moderator:
+        raise PermissionDenied
+
+    try:
+        data = json.loads(request.body)
+        days = {}
+        for poem_id, day in data.get("days", {}).items():
+            days[int(poem_id)] = None if day is None else date.fromisoformat(day)
+        queue = [int(poem_id) for poem_id in data.get("queue", [])]
+
+        daypoems = schedule_daypoems(request.user, days, queue)
+    except ValidationError as e:
+        return JsonResponse({"error": " ".join(e.messages)}, status=400)
+    except (AttributeError, TypeError, ValueError):
+        return JsonResponse({"error": "Invalid request."}, status=400)
+
+    return JsonResponse(
+        {"days": {daypoem.poem_id: daypoem.day.isoformat() for daypoem in daypoems}}
+    )
+
+
 def poems_by_author(request, letter=None):
     # Short-hands.
     letters = settings.ALPHABET[settings.LANGUAGE_CODE]["letters"]
@@ -360,24 +653,77 @@ def poems_by_author(request, letter=None):
         "authors": authors,
         "listing_type": "by-author",
     }
-    return render(request, "poem/poems.html", ctx)
+    return shared_page(request, render(request, "poem/poems.html", ctx))
 
 
 def poems_search(request):
     search_string = request.GET.get("q", "")
+    cursor = request.GET.get("after", None)
+
+    # Popular searches are repeated over and over, so results are cached.
+    # See `poem.search.search_cache_key()`.
+    cache = caches["search"]
+    cache_key = search_cache_key(search_string, cursor)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        page, corrected_search_string = cached
+    else:
+        # Only what's needed for listing the results is fetched, since the
+        # bodies of poems can be quite long.
+        poems = (
+            Poem.objects.select_related("author")
+            .only("name", "author", "author__name_dative")
+            .filter(editorial_status="approved")
+        )
 
-    poems = (
-        Poem.objects.select_related("author")
-        .filter(editorial__status="approved")
-        .search(search_string)
-    )
+        # Results are ordered by relevance and displayed a page at a time.
+        # See `PoemQuerySet.search_index()`.
+        #
+        # Relevance is computed rather than indexed, so it must be computed
+        # for every match before any page can be cut from them. Only the
+        # `SEARCH_MAX_RESULTS` newest matches are therefore ranked, which are
+        # found by the primary key index, so that broad searches don't rank
+        # a large part of the collection on every page.
+        def search_page(search_string):
+            matching_ids = list(
+                poems.search(search_string)
+                .order_by("-id")
+                .values_list("id", flat=True)[: settings.SEARCH_MAX_RESULTS]
+            )
+            return paginate_keyset(
+                poems.filter(id__in=matching_ids).search(search_string),
+                ["-search_rank", "-id"],
+                cursor,
+                settings.SEARCH_PAGE_SIZE,
+            )
+
+        page = search_page(search_string)
+
+        # If nothing is found, the user may have misspelled something, so we
+        # try again with the closest known words instead of making them guess.
+        corrected_search_string = None
+        if settings.SEARCH_FUZZY and search_mode() != "substring" and len(page) == 0:
+            corrected = SearchTrigram.objects.correct(search_string)
+            if tokenize(corrected) != tokenize(search_string):
+                corrected_search_string = corrected
+                page = search_page(corrected_search_string)
+
+        cache.set(cache_key, (page, corrected_search_string))
 
     ctx = {
-        "poems": poems,
+        "poems": page,
         "search_string": search_string,
+        "corrected_search_string": corrected_search_string,
         "listing_type": "search",
     }
-    return render(request, "poem/poems.html", ctx)
+    return shared_page(request, render(request, "poem/poems.html", ctx))
+
+
+def poems_autocomplete(request):
+    # Suggestions for the search box, served from memory. See
+    # `poem.autocomplete`.
+    prefix = request.GET.get("q", "")
+    return JsonResponse(autocomplete.lookup(prefix, settings.AUTOCOMPLETE_LIMIT))
 
 
 @login_required
@@ -392,7 +738,7 @@ def poems_moderate(request, poem_id=None):
         # Manage `poem_id`, making sure it's a proper ID (and an integer).
         try:
             poem = Poem.objects.get(
-                id=int(poem_id), editorial__status__in=["pending", "rejected"]
+                id=int(poem_id), editorial_status__in=["pending", "rejected"]
             )
         except Poem.DoesNotExist:
             # This will only happen when requesting a poem that does not
@@ -408,15 +754,23 @@ def poems_moderate(request, poem_id=None):
                 "poem_id must be a valid ID of a poem pending approval."
             )
 
-        if status == "approved":
-            # Yay! A new poem on our website! \o/
-            poem.set_editorial_status("approved", request.user)
-        elif status == "rejected":
-            # Hopefully the reason is good.
-            reason = request.POST.get("reason", "")
-            poem.set_editorial_status("rejected", request.user, reason)
-        else:
-            raise ValidationError("Invalid status received.")
+        try:
+            if status == "approved":
+                # Yay! A new poem on our website! \o/
+                poem.set_editorial_status("approved", request.user)
+            elif status == "rejected":
+                # Hopefully the reason is good.
+                reason = request.POST.get("reason", "")
+                poem.set_editorial_status("rejected", request.user, reason)
+            else:
+                raise ValidationError("Invalid status received.")
+        except EditorialConflict:
+            # Another moderator decided on the poem while this one was
+            # reading it over.
+            editorial_conflict(request)
+
+        # The poem has been dealt with, so nobody needs to hold on to it.
+        ModerationLease.objects.filter(poem=poem).delete()
 
         # Redirect so that browser won't want to re-post on reload.
         return redirect(reverse("poems_moderate"))
@@ -425,39 +779,131 @@ def poems_moderate(request, poem_id=None):
         "author", "editorial"
     )
 
-    pending_poems = poems.filter(editorial__status="pending")
-
     # Moderators may pick a specific poem to moderate, for example by
     # request, but are otherwise given one at random.
     if poem_id is not None:
         # The rejection of a poem may be revised by another moderator, while rejected poems are not considered during general moderation.
         try:
             poem = Poem.objects.get(
-                editorial__status__in=["pending", "rejected"], id=poem_id
+                editorial_status__in=["pending", "rejected"], id=poem_id
             )
         except Poem.DoesNotExist:
             raise Http404
     else:
-        # The randomness factor is to reduce the likelyhood of two moderators
-        # working on the same poem at the same time.
-        poem = pending_poems.order_by("?").first()
+        # Moderators are given the oldest poem that no other moderator is
+        # currently reviewing. One that the moderator has chosen to skip is
+        # released back to the queue for others.
+        skipped_ids = []
+        skip = request.GET.get("skip", "")
+        if skip.isdigit():
+            skipped_ids.append(int(skip))
+            ModerationLease.objects.filter(
+                poem_id=int(skip), user=request.user
+            ).delete()
+
+        poem = poems.claim_for_moderation(request.user, exclude_ids=skipped_ids)
 
     ctx = {
-        "poem_count": pending_poems.count(),
+        "poem_count": EditorialStatusCount.objects.get_count("pending"),
         "poem": poem,
     }
     return render(request, "poem/moderate.html", ctx)
 
 
+# Makes the same editorial decision on many poems at once. Only poems pending
+# approval or previously rejected are decided upon, like in `poems_moderate`,
+# so poems already dealt with by another moderator in the meantime are left
+# alone. Returns the poems decided upon.
+def moderate_batch(user, poem_ids, status, reason):
+    if status not in ["approved", "rejected"]:
+        raise ValidationError("Invalid status received.")
+    if status == "rejected" and not reason:
+        raise ValidationError("A reason must be given for rejection.")
+
+    poems = Poem.objects.exclude(author=None).filter(
+        id__in=poem_ids, editorial_status__in=["pending", "rejected"]
+    )
+    return poems.bulk_set_editorial_status(
+        status, user, reason if status == "rejected" else None
+    )
+
+
 @login_required
-def poems_moderate_rejected(request):
+def poems_moderate_batch(request):
     if not request.user.is_moderator:
         raise PermissionDenied
 
-    poems = Poem.objects.select_related("editorial").filter(
-        editorial__status="rejected"
+    if request.method == "POST":
+        poem_ids = [int(i) for i in request.POST.getlist("poem_id") if i.isdigit()]
+        status = request.POST.get("status", None)
+        reason = request.POST.get("reason", "")
+
+        try:
+            poems = moderate_batch(request.user, poem_ids, status, reason)
+
+            if status == "approved":
+                message = _("%(count)d poems approved.")
+            else:
+                message = _("%(count)d poems rejected.")
+            messages.add_message(
+                request, messages.SUCCESS, message % {"count": len(poems)}
+            )
+        except ValidationError as e:
+            messages.add_message(request, messages.ERROR, " ".join(e.messages))
+
+        # Redirect so that browser won't want to re-post on reload.
+        return redirect(reverse("poems_moderate_batch"))
+
+    # Poems currently being reviewed by other moderators are left to them.
+    now = timezone.now()
+    poems = (
+        Poem.objects.exclude(author=None)
+        .select_related("author")
+        .filter(editorial_status="pending")
+        .exclude(
+            Q(moderation_lease__expires__gt=now)
+            & ~Q(moderation_lease__user=request.user)
+        )
+        .order_by("editorial_timing", "id")[: settings.MODERATION_BATCH_SIZE]
     )
 
+    ctx = {
+        "poems": poems,
+    }
+    return render(request, "poem/moderate-batch.html", ctx)
+
+
+# The same as `poems_moderate_batch`, for scripts. Expects a JSON object with
+# a list of `poem_ids`, a `status` of either "approved" or "rejected", and a
+# `reason` when rejecting. Responds with the IDs of the poems decided upon,
+# which exclude those that were not pending review.
+@login_required
+@require_POST
+def poems_moderate_batch_api(request):
+    if not request.user.is_moderator:
+        raise PermissionDenied
+
+    try:
+        data = json.loads(request.body)
+        poem_ids = [int(i) for i in data.get("poem_ids", [])]
+        poems = moderate_batch(
+            request.user, poem_ids, data.get("status"), data.get("reason", "")
+        )
+    except ValidationError as e:
+        return JsonResponse({"error": " ".join(e.messages)}, status=400)
+    except (AttributeError, TypeError, ValueError):
+        return JsonResponse({"error": "Invalid request."}, status=400)
+
+    return JsonResponse({"poem_ids": [poem.id for poem in poems]})
+
+
+@login_required
+def poems_moderate_rejected(request):
+    if not request.user.is_moderator:
+        raise PermissionDenied
+
+    poems = Poem.objects.select_related("editorial").filter(editorial_status="rejected")
+
     ctx = {
         "poems": poems,
     }
@@ -469,13 +915,24 @@ def poems(request):
 
 
 def poem(request, poem_id):
-    try:
-        # The specific poem being requested.
+    poem = None
+    if settings.USER_FRAGMENTS:
+        # Approved poems look the same to everyone, so they are looked up
+        # without regard to the user. See `content_user()`.
         poem = (
             Poem.objects.select_related("author")
-            .visible_to(request.user)
-            .get(id=poem_id)
+            .filter(id=poem_id, editorial_status="approved")
+            .first()
         )
+
+    try:
+        # The specific poem being requested.
+        if poem is None:
+            poem = (
+                Poem.objects.select_related("author")
+                .visible_to(request.user)
+                .get(id=poem_id)
+            )
     except Poem.DoesNotExist:
         if not request.user.is_authenticated:
             # If the user isn't logged in, maybe that's the problem.
@@ -485,7 +942,7 @@ def poem(request, poem_id):
             # and asking them to moderate it.
             if (
                 Poem.objects.filter(
-                    id=poem_id, editorial__status__in=["pending", "rejected"]
+                    id=poem_id, editorial_status__in=["pending", "rejected"]
                 ).count()
                 > 0
             ):
@@ -495,10 +952,17 @@ def poem(request, poem_id):
         raise Http404
 
     # Other poems by the same author.
-    poems = poem.author.poems.visible_to(request.user)
+    poems = poem.author.poems.visible_to(content_user(request))
 
     ctx = {
         "poem": poem,
         "poems": poems,
     }
-    return render(request, "poem/poem.html", ctx)
+    response = render(request, "poem/poem.html", ctx)
+
+    # Poems that aren't approved are only visible to some users, so their
+    # pages aren't shared.
+    if poem.editorial_status == "approved":
+        response = shared_page(request, response)
+
+    return response
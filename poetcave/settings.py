@@ -169,6 +169,138 @@ AUTH_USER_MODEL = "core.User"
 # Registration stuff
 ACCOUNT_ACTIVATION_DAYS = 1
 
+# Search
+# Determines how `PoemQuerySet.search` finds poems. Available modes:
+#
+# * "index": Uses the inverted search index maintained in `SearchTerm`.
+# * "postgresql": Uses PostgreSQL's full-text search over search vectors
+#   maintained in `PoemSearchVector`. Falls back to "index" on other
+#   database backends.
+# * "substring": Checks whether the search string occurs anywhere in the
+#   poem's or author's fields, like the original website. Requires a full
+#   table scan on every search.
+SEARCH_MODE = "index"
+
+# The PostgreSQL text search configuration used by the "postgresql" search
+# mode. PostgreSQL ships with no Icelandic configuration, and our own
+# tokenization already normalizes the text, so "simple" is appropriate.
+SEARCH_POSTGRESQL_CONFIG = "simple"
+
+# When a search finds nothing, the words of the search string are corrected
+# against the words of poem names and author names using trigram similarity,
+# and the search is attempted again with the corrected words. Similarity is a
+# number between 0 and 1, and a word is only corrected into another if their
+# similarity is at least `SEARCH_FUZZY_THRESHOLD`. The
+# `SEARCH_FUZZY_CANDIDATES` words sharing the most trigrams with a search
+# word are considered. Not available in the "substring" search mode.
+SEARCH_FUZZY = True
+SEARCH_FUZZY_THRESHOLD = 0.3
+SEARCH_FUZZY_CANDIDATES = 20
+
+# Number of search results displayed at a time.
+SEARCH_PAGE_SIZE = 50
+
+# Maximum number of matches ranked by relevance. When a search matches more
+# poems than this, only the newest ones are ranked and displayed.
+SEARCH_MAX_RESULTS = 1000
+
+# Number of poems displayed at a time on an author's page.
+AUTHOR_PAGE_SIZE = 100
+
+# Number of seconds for which a moderator holds on to a poem being reviewed,
+# before it is returned to the moderation queue for others. Renewed whenever
+# the moderator reloads the page.
+MODERATION_LEASE_SECONDS = 15 * 60
+
+# How many times to try claiming a poem for moderation when other moderators
+# keep claiming the same poems at the same time.
+MODERATION_CLAIM_ATTEMPTS = 10
+
+# Maximum number of poems listed at once for batch moderation.
+MODERATION_BATCH_SIZE = 100
+
+# When enabled, poem, author and listing pages are rendered the same for every
+# user, so that they can be cached and shared between users. The parts that
+# depend on the user, such as the login box and the controls for the user's
+# own poems, are then fetched separately by the browser, all at once, from
+# the `user_fragments` view. The pages may then be cached by browsers and
+# caching proxies for `USER_FRAGMENTS_MAX_AGE` seconds, so changes to poems
+# may take as long to show up.
+USER_FRAGMENTS = False
+USER_FRAGMENTS_MAX_AGE = 60
+
+# Days without a daily poem can be filled automatically with approved poems,
+# with the `fill_daypoems` management command, which fills the next
+# `DAYPOEM_FILL_DAYS` days by default. An author is not picked again within
+# `DAYPOEM_AUTHOR_INTERVAL` days, and a poem not within
+# `DAYPOEM_POEM_INTERVAL` years. Poems are picked by drawing random IDs, up
+# to `DAYPOEM_PICK_ATTEMPTS` times per day, before resorting to counting the
+# eligible poems. See `poem.daypoems`.
+DAYPOEM_FILL_DAYS = 14
+DAYPOEM_AUTHOR_INTERVAL = 30
+DAYPOEM_POEM_INTERVAL = 5
+DAYPOEM_PICK_ATTEMPTS = 20
+
+# Autocomplete
+# Poem and author names suggested in the search box are served from an
+# in-process index (see `poem.autocomplete`). Changes made by other processes
+# are picked up every `AUTOCOMPLETE_SYNC_INTERVAL` seconds, and the index is
+# rebuilt from scratch every `AUTOCOMPLETE_REBUILD_INTERVAL` seconds.
+# `AUTOCOMPLETE_LIMIT` is the maximum number of poems and of authors suggested.
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_SYNC_INTERVAL = 30
+AUTOCOMPLETE_REBUILD_INTERVAL = 3600
+
+# Outgoing mail
+# Emails are queued in the database and sent by the `send_outgoing_mail`
+# management command, which sends up to `MAIL_OUTBOX_BATCH_SIZE` emails over
+# each connection to the mail server. An email that can't be sent is retried
+# after `MAIL_OUTBOX_RETRY_DELAY` seconds, doubling after every failed attempt,
+# until it has been attempted `MAIL_OUTBOX_MAX_ATTEMPTS` times. An email being
+# sent is left alone by other workers for `MAIL_OUTBOX_CLAIM_SECONDS` seconds.
+MAIL_OUTBOX_BATCH_SIZE = 100
+MAIL_OUTBOX_RETRY_DELAY = 60
+MAIL_OUTBOX_MAX_ATTEMPTS = 10
+MAIL_OUTBOX_CLAIM_SECONDS = 10 * 60
+MAIL_OUTBOX_POLL_INTERVAL = 5
+
+# Caches
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+#
+# The "search" cache holds search results, which expire after `TIMEOUT`
+# seconds. When `MAX_ENTRIES` is reached, the least recently used entries are
+# evicted. Cached results are invalidated when poems are approved or
+# unapproved, or when authors' names change.
+#
+# The "pages" cache holds whole pages as seen by anonymous visitors, such as
+# the front page (see `core.frontpage`), and listings that are the same for
+# everyone, such as the newest poems and the years of the daily poem archive.
+# It is file-based so that it is shared by all worker processes on the same
+# machine without further setup.
+#
+# NOTE: The local-memory caches below are not shared between processes, so
+# invalidation only takes effect immediately in the process that caused it.
+# Production deployments with multiple workers should configure a shared
+# cache, such as Memcached or Redis, in `local_settings.py`.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "search": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "search",
+        "TIMEOUT": 600,
+        "OPTIONS": {
+            "MAX_ENTRIES": 1000,
+        },
+    },
+    "pages": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache" / "pages",
+        "TIMEOUT": 2 * 24 * 60 * 60,
+    },
+}
+
 # Import customizable settings.
 from poetcave.local_settings import *
 